@@ -1,14 +1,993 @@
 # title : Video Downloader
 
 import os
-import tkinter as tk
-from tkinter import ttk, messagebox, filedialog
-from threading import Thread
+import re
+import sys
+import json
+import math
+import queue
+import time
+import argparse
+import functools
+import tempfile
+import heapq
+import sqlite3
+import hashlib
+import itertools
+import subprocess
+import multiprocessing
+from threading import Thread, Lock, Condition, Event, local
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
 from urllib.parse import urlparse
+from urllib.request import Request, urlopen
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 import yt_dlp
 
+try:
+    import tkinter as tk
+    from tkinter import ttk, messagebox, filedialog
+except ImportError:
+    tk = None
 
-class VideoDownloaderApp(tk.Tk):
+PLAYLIST_WORKERS = 8  # playlist entries resolved in parallel
+FORMAT_CACHE_DIR = "format_cache"
+FORMAT_CACHE_TTL = 6 * 60 * 60  # seconds before a cached entry is refreshed in the background
+FORMAT_CACHE_MAX_ENTRIES = 500
+MAX_CONCURRENT_DOWNLOADS = 3
+MAX_DOWNLOADS_PER_HOST = 2
+BANDWIDTH_LIMIT = 0  # bytes/sec shared by all downloads, 0 = unlimited
+FRAGMENT_CONNECTIONS = 4  # parallel fragments for DASH/HLS formats
+RANGE_CONNECTIONS = 4  # parallel Range requests for direct file URLs
+RANGE_MIN_SIZE = 8 * 1024 * 1024  # smaller files aren't worth splitting
+RANGE_BLOCK_SIZE = 256 * 1024
+JOURNAL_FILE = "download_journal.db"
+JOURNAL_PROGRESS_INTERVAL = 2.0  # seconds between byte-offset saves per download
+POSTPROCESS_WORKERS = os.cpu_count() or 2  # ffmpeg conversions run in separate processes
+FFMPEG = 'ffmpeg'
+FFPROBE = 'ffprobe'
+# Streams in these codecs can go into an .mp4 as-is; anything else is re-encoded.
+MP4_VIDEO_CODECS = ('h264', 'hevc', 'av1', 'mpeg4')
+MP4_AUDIO_CODECS = ('aac', 'mp3', 'ac3', 'eac3', 'alac')
+PROGRESS_FLUSH_MS = 100  # status column refresh rate (10 Hz)
+SPEED_SMOOTHING = 3.0  # seconds; time constant of the moving average behind speed and ETA
+DEFAULT_FORMAT = "bestvideo[ext=mp4]+bestaudio[ext=m4a]/best[ext=mp4]/best"
+INVALID_FILENAME_CHARS = str.maketrans({char: '_' for char in '/\\:*?"<>|'})
+DIRECT_EXTENSIONS = ('.mp4', '.webm', '.mkv', '.mov', '.m4v', '.m4a', '.mp3', '.ogg', '.flac', '.wav')
+
+# Only what the table and downloads need is cached, not yt-dlp's whole info dict.
+FORMAT_FIELDS = ('format_id', 'ext', 'resolution', 'format_note', 'width', 'height', 'fps',
+                 'vcodec', 'acodec', 'filesize', 'filesize_approx', 'tbr')
+ENTRY_FIELDS = ('id', 'ie_key', 'title', 'url', 'webpage_url')
+
+
+FILTER_NUMERIC = ('height', 'width', 'fps', 'tbr', 'size', 'filesize')
+FILTER_TEXT = ('ext', 'vcodec', 'acodec', 'format', 'title')
+FILTER_TOKEN = re.compile(r"\s*(>=|<=|!=|==|=|>|<|\(|\)|[^\s()<>=!]+)")
+FILTER_OPERATORS = ('>=', '<=', '!=', '==', '=', '>', '<')
+FILTER_SIZE = re.compile(r"(\d+(?:\.\d+)?)(k|kb|m|mb|g|gb)?")
+FILTER_SIZE_UNITS = {'k': 1024, 'm': 1024 ** 2, 'g': 1024 ** 3}  # no unit means MB
+
+
+def slim_info(info):
+    slim = {key: info.get(key) for key in ('id', 'title', 'webpage_url', 'extractor_key')}
+    if 'entries' in info:
+        slim['entries'] = [{key: entry.get(key) for key in ENTRY_FIELDS} for entry in info['entries'] if entry]
+    else:
+        slim['formats'] = [{key: fmt.get(key) for key in FORMAT_FIELDS} for fmt in info.get('formats') or []]
+    return slim
+
+
+class FormatRow:
+    # Typed copy of one table row. Sort keys are computed once here, so sorting never reads
+    # cells back out of the Treeview or re-parses display strings.
+    def __init__(self, key, video_url, title, fmt, order):
+        self.key = key
+        self.video_url = video_url
+        self.title = title
+        self.order = order  # (playlist position, format position): the unsorted order
+        self.format_id = str(fmt.get('format_id') or '')
+        self.ext = (fmt.get('ext') or '').lower()
+        self.width = fmt.get('width') or 0
+        self.height = fmt.get('height') or 0
+        self.fps = fmt.get('fps') or 0
+        self.tbr = fmt.get('tbr') or 0
+        self.vcodec = (fmt.get('vcodec') or 'none').lower()
+        self.acodec = (fmt.get('acodec') or 'none').lower()
+        self.filesize = fmt.get('filesize') or 0
+        self.resolution = (fmt.get('resolution') or fmt.get('format_note')
+                           or f"{fmt.get('width', '')}x{fmt.get('height', '')}")
+        self.sort_keys = {
+            'title': self.title.casefold(),
+            'format': (0, int(self.format_id), '') if self.format_id.isdigit() else (1, 0, self.format_id),
+            'resolution': (self.height, self.width, self.fps),
+            'filesize': self.filesize,
+        }
+
+    @classmethod
+    def from_values(cls, key, video_url, values, order):
+        # Rows restored from the journal only have their display strings.
+        title, format_id, resolution, size_mb = values[:4]
+        fmt = {'format_id': format_id, 'resolution': resolution}
+        dims = re.match(r"(\d+)x(\d+)", resolution) or re.match(r"()(\d+)p", resolution)
+        if dims:
+            fmt['width'], fmt['height'] = int(dims.group(1) or 0), int(dims.group(2))
+        if size_mb != "N/A":
+            fmt['filesize'] = int(float(size_mb) * 1024 * 1024)
+        return cls(key, video_url, title, fmt, order)
+
+    def values(self, status=""):
+        size_mb = f"{self.filesize / (1024 * 1024):.2f}" if self.filesize else "N/A"
+        return (self.title, self.format_id, self.resolution, size_mb, status)
+
+
+def compile_filter(text):
+    # Turns an expression like "mp4 and height>=1080" or "vcodec=avc1 or (webm and not size>500)"
+    # into a predicate over FormatRow. A bare word matches the extension, a codec prefix, the
+    # format ID or part of the title; "1080p" is shorthand for height=1080. Sizes are in MB unless
+    # given as k/kb, m/mb or g/gb, and a size comparison never matches a format of unknown size.
+    tokens = FILTER_TOKEN.findall(text)
+    if "".join(tokens) != "".join(text.split()):
+        raise ValueError("unrecognised characters")
+    position = [0]
+
+    def peek():
+        return tokens[position[0]].lower() if position[0] < len(tokens) else None
+
+    def take():
+        position[0] += 1
+        return tokens[position[0] - 1]
+
+    def parse_or():
+        left = parse_and()
+        while peek() == 'or':
+            take()
+            left = (lambda a, b: lambda row: a(row) or b(row))(left, parse_and())
+        return left
+
+    def parse_and():
+        left = parse_not()
+        while peek() not in (None, 'or', ')'):
+            if peek() == 'and':
+                take()
+            left = (lambda a, b: lambda row: a(row) and b(row))(left, parse_not())
+        return left
+
+    def parse_not():
+        token = peek()
+        if token is None:
+            raise ValueError("expression ends early")
+        if token == 'not':
+            take()
+            inner = parse_not()
+            return lambda row: not inner(row)
+        if token == '(':
+            take()
+            inner = parse_or()
+            if peek() != ')':
+                raise ValueError("missing ')'")
+            take()
+            return inner
+        return parse_term()
+
+    def parse_term():
+        word = take().lower()
+        if word in ('and', 'or', ')') or word in FILTER_OPERATORS:
+            raise ValueError(f"unexpected '{word}'")
+        if peek() in FILTER_OPERATORS:
+            op = take()
+            if peek() is None:
+                raise ValueError(f"missing value after {word}{op}")
+            return comparison(word, op, take().lower())
+        if re.fullmatch(r"\d+p", word):
+            height = int(word[:-1])
+            return lambda row: row.height == height
+        return lambda row: (row.ext == word or row.vcodec.startswith(word) or row.acodec.startswith(word)
+                            or row.format_id.lower() == word or word in row.title.casefold())
+
+    def comparison(field, op, value):
+        if field in FILTER_NUMERIC:
+            compare = {'>=': float.__ge__, '<=': float.__le__, '>': float.__gt__, '<': float.__lt__,
+                       '=': float.__eq__, '==': float.__eq__, '!=': float.__ne__}[op]
+            if field in ('size', 'filesize'):
+                size = FILTER_SIZE.fullmatch(value)
+                if not size:
+                    raise ValueError(f"{field} needs a size like 500, 500mb or 1.5gb, got '{value}'")
+                number = float(size.group(1)) * FILTER_SIZE_UNITS[(size.group(2) or 'm')[0]]
+                # 0 means the size is unknown, which is neither bigger nor smaller than anything.
+                return lambda row: bool(row.filesize) and compare(float(row.filesize), number)
+            try:
+                number = float(value[:-1] if value.endswith('p') else value)
+            except ValueError:
+                raise ValueError(f"{field} needs a number, got '{value}'")
+            return lambda row: compare(float(getattr(row, field)), number)
+        if field in FILTER_TEXT:
+            if op not in ('=', '==', '!='):
+                raise ValueError(f"{field} only supports = and !=")
+            if field == 'title':
+                match = lambda row: value in row.title.casefold()
+            elif field == 'format':
+                match = lambda row: row.format_id.lower() == value
+            elif field == 'ext':
+                match = lambda row: row.ext == value
+            else:
+                match = lambda row: getattr(row, field).startswith(value)
+            return match if op != '!=' else (lambda row: not match(row))
+        raise ValueError(f"unknown field '{field}'")
+
+    predicate = parse_or()
+    if position[0] != len(tokens):
+        raise ValueError(f"unexpected '{tokens[position[0]]}'")
+    return predicate
+
+
+class FormatCache:
+    # On-disk cache of extracted formats, one JSON file per video ID (or URL), LRU by file mtime.
+    # Stale entries are served immediately while a background refresh re-extracts them
+    # (stale-while-revalidate). `extractor` is any callable url -> info dict.
+    def __init__(self, directory=FORMAT_CACHE_DIR, ttl=FORMAT_CACHE_TTL, max_entries=FORMAT_CACHE_MAX_ENTRIES):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.refresher = ThreadPoolExecutor(max_workers=2)
+        self.refreshing = set()
+        self.lock = Lock()
+
+    def path(self, key):
+        return os.path.join(self.directory, hashlib.sha1(key.encode('utf-8')).hexdigest() + ".json")
+
+    def load(self, key):
+        try:
+            with open(self.path(key), "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            os.utime(self.path(key))
+            return entry
+        except (OSError, ValueError):
+            return None
+
+    def store(self, key, info):
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = self.path(key) + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({'stored_at': time.time(), 'info': slim_info(info)}, f)
+        os.replace(tmp_path, self.path(key))
+        self.prune()
+
+    def prune(self):
+        with self.lock:
+            files = [os.path.join(self.directory, name) for name in os.listdir(self.directory) if name.endswith(".json")]
+            if len(files) <= self.max_entries:
+                return
+            files.sort(key=os.path.getmtime)
+            for path in files[:len(files) - self.max_entries]:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def get(self, url, extractor, key=None, on_refresh=None):
+        key = key or url
+        entry = self.load(key)
+        if entry is None:
+            info = extractor(url)
+            self.store(key, info)
+            return slim_info(info)
+        if time.time() - entry['stored_at'] > self.ttl:
+            self.refresh(url, extractor, key, on_refresh)
+        return entry['info']
+
+    def refresh(self, url, extractor, key, on_refresh):
+        with self.lock:
+            if key in self.refreshing:
+                return
+            self.refreshing.add(key)
+
+        def run():
+            try:
+                info = extractor(url)
+                self.store(key, info)
+                if on_refresh:
+                    on_refresh(slim_info(info))
+            except Exception:
+                pass  # keep serving the stale copy
+            finally:
+                with self.lock:
+                    self.refreshing.discard(key)
+
+        self.refresher.submit(run)
+
+
+
+class BandwidthLimiter:
+    # Token bucket shared by every active download. Callers take what they need and sleep off
+    # any debt outside the lock, so a fast connection can't starve the others for long.
+    # `burst` is the bucket size in bytes (default: one second's worth).
+    def __init__(self, rate=BANDWIDTH_LIMIT, burst=None):
+        self.lock = Lock()
+        self.set_rate(rate, burst)
+
+    def set_rate(self, rate, burst=None):
+        with self.lock:
+            self.rate = max(0, rate)
+            self.burst = self.rate if burst is None else burst
+            self.tokens = self.burst
+            self.last = time.monotonic()
+
+    def consume(self, amount):
+        with self.lock:
+            if not self.rate:
+                return
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.last) * self.rate) - amount
+            self.last = now
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0
+        if wait:
+            time.sleep(wait)
+
+
+bandwidth = BandwidthLimiter()
+
+
+def is_direct_media(url):
+    return urlparse(url).path.lower().endswith(DIRECT_EXTENSIONS)
+
+
+def probe_ranges(url):
+    # Returns (size, supports_ranges); size is None when the server doesn't say.
+    with urlopen(Request(url, method="HEAD"), timeout=30) as response:
+        size = response.headers.get("Content-Length")
+        ranges = response.headers.get("Accept-Ranges", "").lower() == "bytes"
+    return (int(size) if size else None), ranges
+
+
+class RangeIgnored(IOError):
+    # The server answered a Range request with something other than that range.
+    pass
+
+
+def download_ranged(url, path, connections=RANGE_CONNECTIONS, limiter=bandwidth, progress_hook=None, segments=None):
+    # Splits a direct file URL into `connections` byte ranges fetched in parallel into one
+    # preallocated .part file. Falls back to a single stream when ranges aren't supported,
+    # including servers that advertise them but answer a Range request with the whole file.
+    # `segments` is a list of [next_byte, last_byte] pairs kept current as data lands; pass the
+    # list saved from an interrupted run to continue it instead of starting over.
+    size, ranges = probe_ranges(url)
+    if not size or not ranges or size < RANGE_MIN_SIZE:
+        connections = 1
+    part_path = path + ".part"
+    if segments is None:
+        segments = []
+    resuming = bool(ranges and size and segments and os.path.exists(part_path)
+                    and os.path.getsize(part_path) == size and segments[-1][1] == size - 1)
+    if not resuming:
+        span = -(-size // connections) if size else 0
+        segments[:] = [[i * span, min(size, (i + 1) * span) - 1] for i in range(connections)] if size else [[0, None]]
+        with open(part_path, "wb") as f:
+            if size:
+                f.truncate(size)
+
+    lock = Lock()
+    stop = Event()
+    errors = []
+    downloaded = [size - sum(end - start + 1 for start, end in segments) if resuming else 0]
+
+    def fetch(segment):
+        try:
+            start, end = segment
+            if end is not None and start > end:
+                return
+            request = Request(url)
+            if end is not None and (len(segments) > 1 or resuming):
+                request.add_header("Range", f"bytes={start}-{end}")
+            with urlopen(request, timeout=30) as response, open(part_path, "r+b") as f:
+                if request.has_header("Range") and (
+                        response.status != 206
+                        or not response.headers.get("Content-Range", "").startswith(f"bytes {start}-{end}/")):
+                    raise RangeIgnored(f"Range {start}-{end} answered with HTTP {response.status}")
+                f.seek(start)
+                while not stop.is_set():
+                    block = response.read(RANGE_BLOCK_SIZE)
+                    if not block:
+                        break
+                    limiter.consume(len(block))
+                    f.write(block)
+                    f.flush()  # offsets may be journaled below; never record bytes still in our buffer
+                    with lock:
+                        segment[0] += len(block)
+                        downloaded[0] += len(block)
+                        done = downloaded[0]
+                    if progress_hook:
+                        progress_hook({'status': 'downloading', 'downloaded_bytes': done, 'total_bytes': size})
+        except Exception as e:
+            errors.append(e)
+            stop.set()
+
+    threads = [Thread(target=fetch, args=(segment,), daemon=True) for segment in segments]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if any(isinstance(e, RangeIgnored) for e in errors):
+        segments.clear()
+        return download_ranged(url, path, 1, limiter, progress_hook, segments)
+    if errors:
+        raise errors[0]
+    if size and downloaded[0] != size:
+        raise IOError(f"Incomplete download: got {downloaded[0]} of {size} bytes")
+    os.replace(part_path, path)
+    if progress_hook:
+        progress_hook({'status': 'finished', 'downloaded_bytes': downloaded[0], 'total_bytes': size})
+    return downloaded[0]
+
+
+def probe_codecs(path):
+    output = subprocess.run([FFPROBE, '-v', 'error', '-show_entries', 'stream=codec_type,codec_name',
+                             '-of', 'json', path], capture_output=True, check=True, text=True).stdout
+    codecs = {}
+    for stream in json.loads(output).get('streams', []):
+        codecs.setdefault(stream.get('codec_type'), stream.get('codec_name'))
+    return codecs.get('video'), codecs.get('audio')
+
+
+def postprocess_file(path, convert=True):
+    # Runs in the post-processing pool. Makes sure the file is an .mp4, copying streams when their
+    # codecs already fit (remux) and re-encoding only the stream that doesn't. Also hashes the
+    # final file here, since that's CPU work too. Returns the final path, action, hash and timings.
+    started = time.time()
+    action = 'none'
+    if convert:
+        video, audio = probe_codecs(path)
+        video_ok = video is None or video in MP4_VIDEO_CODECS
+        audio_ok = audio is None or audio in MP4_AUDIO_CODECS
+        base, ext = os.path.splitext(path)
+        if not (ext.lower() == '.mp4' and video_ok and audio_ok):
+            action = 'remux' if video_ok and audio_ok else 'encode'
+            target = base + '.mp4'
+            temp = base + '.converting.mp4'
+            command = [FFMPEG, '-y', '-v', 'error', '-i', path, '-map', '0:v?', '-map', '0:a?',
+                       '-c:v', 'copy' if video_ok else 'libx264', '-c:a', 'copy' if audio_ok else 'aac',
+                       '-movflags', '+faststart', temp]
+            subprocess.run(command, capture_output=True, check=True)
+            os.replace(temp, target)
+            if os.path.abspath(target) != os.path.abspath(path):
+                os.remove(path)
+            path = target
+    converted = time.time()
+    return {'path': path, 'action': action, 'hash': file_sha256(path),
+            'started': started, 'convert': converted - started, 'hash_time': time.time() - converted}
+
+
+class ProgressAggregator:
+    # Download threads report bytes as often as they like; the UI drains one snapshot per
+    # changed row at a fixed rate. Speed is an exponential moving average weighted by the
+    # time between reports, so it doesn't depend on how often yt-dlp calls back.
+    def __init__(self, smoothing=SPEED_SMOOTHING):
+        self.smoothing = smoothing
+        self.lock = Lock()
+        self.rows = {}
+        self.dirty = set()
+
+    def report(self, key, downloaded, total):
+        now = time.monotonic()
+        with self.lock:
+            row = self.rows.get(key)
+            if row is None:
+                self.rows[key] = {'downloaded': downloaded, 'total': total, 'time': now, 'speed': None}
+            else:
+                elapsed = now - row['time']
+                if elapsed > 0:
+                    rate = max(0, downloaded - row['downloaded']) / elapsed
+                    weight = 1 - math.exp(-elapsed / self.smoothing)
+                    row['speed'] = rate if row['speed'] is None else row['speed'] + weight * (rate - row['speed'])
+                    row['time'] = now
+                row['downloaded'], row['total'] = downloaded, total
+            self.dirty.add(key)
+
+    def forget(self, key):
+        with self.lock:
+            self.rows.pop(key, None)
+            self.dirty.discard(key)
+
+    def drain(self):
+        # Returns {key: (downloaded, total, speed, eta)} for rows reported since the last drain.
+        with self.lock:
+            changed, self.dirty = self.dirty, set()
+            snapshot = {}
+            for key in changed:
+                row = self.rows[key]
+                speed = row['speed']
+                eta = (row['total'] - row['downloaded']) / speed if speed and row['total'] else None
+                snapshot[key] = (row['downloaded'], row['total'], speed, eta)
+        return snapshot
+
+
+def format_progress(downloaded, total, speed, eta):
+    parts = [f"{downloaded / total * 100:.1f}%" if total else f"{downloaded / (1024 * 1024):.1f} MB"]
+    if speed:
+        parts.append(f"{speed / (1024 * 1024):.1f} MB/s")
+    if eta is not None:
+        minutes, seconds = divmod(int(eta), 60)
+        parts.append(f"{minutes}:{seconds:02d}")
+    return " · ".join(parts)
+
+
+class DownloadInterrupted(Exception):
+    pass
+
+
+def job_key(video_url, format_id):
+    # Stable across restarts, so it doubles as the Treeview row ID and the journal key.
+    return f"{video_url}#{format_id}"
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+ACTIVE_STATES = ('queued', 'downloading', 'processing', 'paused')
+
+
+class DownloadItem:
+    def __init__(self, key, url, values, priority, seq, folder=None):
+        self.key = key
+        self.url = url
+        self.values = values
+        self.priority = priority
+        self.seq = seq
+        self.folder = folder
+        self.host = urlparse(url).hostname or ""
+        self.state = 'queued'  # queued, downloading, processing, paused, done, failed, cancelled
+        self.stop_request = None  # 'pause' or 'cancel' while downloading
+        self.error = None
+        self.note = None  # 'existing' or 'duplicate' when done without a new file
+        self.output_path = None
+        self.content_hash = None
+        self.bytes_done = 0
+        self.bytes_total = None
+        self.segments = None  # ranged-download offsets, see download_ranged
+        self.queued_at = time.time()
+        self.timings = {}  # stage -> seconds: wait, download, convert_wait, remux/encode, hash
+
+
+class DownloadJournal:
+    # SQLite record of every download the app has queued, so the queue survives a crash or restart.
+    # State changes are committed immediately; byte offsets at most every JOURNAL_PROGRESS_INTERVAL.
+    def __init__(self, path=JOURNAL_FILE):
+        self.lock = Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("""CREATE TABLE IF NOT EXISTS downloads (
+            job_key TEXT PRIMARY KEY,
+            url TEXT NOT NULL,
+            row_values TEXT NOT NULL,
+            folder TEXT,
+            state TEXT NOT NULL,
+            priority INTEGER NOT NULL,
+            seq INTEGER NOT NULL,
+            output_path TEXT,
+            bytes_done INTEGER NOT NULL DEFAULT 0,
+            bytes_total INTEGER,
+            segments TEXT,
+            content_hash TEXT,
+            error TEXT,
+            updated_at REAL NOT NULL)""")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS downloads_state ON downloads (state)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS downloads_hash ON downloads (content_hash)")
+        self.conn.commit()
+
+    def record(self, item):
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO downloads VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (item.key, item.url, json.dumps(list(item.values)), item.folder, item.state, item.priority,
+                 item.seq, item.output_path, item.bytes_done, item.bytes_total,
+                 json.dumps(item.segments) if item.segments else None, item.content_hash,
+                 str(item.error) if item.error else None, time.time()))
+            self.conn.commit()
+
+    def save_progress(self, item):
+        with self.lock:
+            self.conn.execute(
+                "UPDATE downloads SET bytes_done = ?, bytes_total = ?, segments = ?, updated_at = ? WHERE job_key = ?",
+                (item.bytes_done, item.bytes_total, json.dumps(item.segments) if item.segments else None,
+                 time.time(), item.key))
+            self.conn.commit()
+
+    def pending(self):
+        # Everything that hadn't finished, in queue order. Rows left 'downloading' or 'processing' by a
+        # crash come back queued.
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT job_key, url, row_values, folder, state, priority, bytes_done, bytes_total, segments "
+                "FROM downloads WHERE state IN ('queued', 'downloading', 'processing', 'paused') "
+                "ORDER BY priority, seq").fetchall()
+        return [{'key': key, 'url': url, 'values': tuple(json.loads(values)), 'folder': folder,
+                 'state': 'paused' if state == 'paused' else 'queued', 'priority': priority,
+                 'bytes_done': bytes_done, 'bytes_total': bytes_total,
+                 'segments': json.loads(segments) if segments else None}
+                for key, url, values, folder, state, priority, bytes_done, bytes_total, segments in rows]
+
+    def completed_path(self, key):
+        with self.lock:
+            row = self.conn.execute("SELECT output_path FROM downloads WHERE job_key = ? AND state = 'done'",
+                                    (key,)).fetchone()
+        return row[0] if row and row[0] and os.path.exists(row[0]) else None
+
+    def path_for_hash(self, content_hash, exclude_key):
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT output_path FROM downloads WHERE content_hash = ? AND state = 'done' AND job_key != ?",
+                (content_hash, exclude_key)).fetchall()
+        return next((path for (path,) in rows if path and os.path.exists(path)), None)
+
+
+class DownloadManager:
+    # Fixed pool of worker threads fed from a priority heap (lower number runs first),
+    # with a cap on simultaneous transfers per host. `worker(item)` does the actual download
+    # and should call `checkpoint(item)` regularly so pause/cancel can interrupt it.
+    # If `worker` returns a Future, the item moves to 'processing' and its slot is freed for the
+    # next download; it's done when the Future resolves.
+    # `on_update(item)` is called from worker threads on every state change, after the change
+    # is written to `journal` (optional). Both run under the manager's (reentrant) lock, so they
+    # see changes one at a time and in order; keep them quick.
+    def __init__(self, worker, on_update=None, max_workers=MAX_CONCURRENT_DOWNLOADS,
+                 per_host=MAX_DOWNLOADS_PER_HOST, journal=None):
+        self.worker = worker
+        self.on_update = on_update or (lambda item: None)
+        self.journal = journal
+        self.per_host = per_host
+        self.items = {}
+        self.heap = []
+        self.host_active = {}
+        self.seq = itertools.count()
+        self.cond = Condition()
+        for _ in range(max_workers):
+            Thread(target=self.run_worker, daemon=True).start()
+
+    def enqueue(self, key, url, values, priority=0, folder=None, paused=False, restored=None, completed=None):
+        # `restored` carries byte offsets from the journal for an item being resumed after a restart;
+        # `completed` is the existing file of an item that was already downloaded, which is
+        # recorded as done without queueing it.
+        with self.cond:
+            item = self.items.get(key)
+            if item and item.state in ACTIVE_STATES:
+                return False
+            item = self.items[key] = DownloadItem(key, url, values, priority, next(self.seq), folder)
+            if restored:
+                item.bytes_done, item.bytes_total = restored['bytes_done'], restored['bytes_total']
+                item.segments = restored['segments']
+            if completed:
+                # Its finished journal row (path, content hash) is already right; rewriting it from
+                # this fresh item would lose the hash that duplicate detection relies on.
+                item.state, item.output_path, item.note = 'done', completed, 'existing'
+                self.on_update(item)
+                return True
+            if paused:
+                item.state = 'paused'
+            else:
+                heapq.heappush(self.heap, (item.priority, item.seq, key))
+                self.cond.notify()
+            self.notify(item)
+        return True
+
+    def notify(self, item):
+        if self.journal:
+            self.journal.record(item)
+        self.on_update(item)
+
+    def save_progress(self, item, downloaded, total):
+        item.bytes_done, item.bytes_total = downloaded, total
+        now = time.monotonic()
+        if self.journal and now - getattr(item, 'saved_at', 0) >= JOURNAL_PROGRESS_INTERVAL:
+            item.saved_at = now
+            self.journal.save_progress(item)
+
+    def is_active(self, key):
+        with self.cond:
+            item = self.items.get(key)
+            return bool(item) and item.state in ACTIVE_STATES
+
+    def state(self, key):
+        with self.cond:
+            item = self.items.get(key)
+            return item.state if item else None
+
+    def set_priority(self, key, priority):
+        with self.cond:
+            item = self.items.get(key)
+            if not item or item.state != 'queued':
+                return
+            # Stale heap entries are skipped when popped, so just push a new one.
+            item.priority, item.seq = priority, next(self.seq)
+            heapq.heappush(self.heap, (item.priority, item.seq, key))
+            self.cond.notify()
+
+    def pause(self, key):
+        with self.cond:
+            item = self.items.get(key)
+            if not item:
+                return
+            if item.state == 'queued':
+                item.state = 'paused'
+            elif item.state == 'downloading':
+                item.stop_request = 'pause'
+                return
+            else:
+                return
+            self.notify(item)
+
+    def resume(self, key):
+        with self.cond:
+            item = self.items.get(key)
+            if not item or item.state != 'paused':
+                return
+            item.state = 'queued'
+            item.queued_at = time.time()
+            item.seq = next(self.seq)
+            heapq.heappush(self.heap, (item.priority, item.seq, key))
+            self.cond.notify()
+            self.notify(item)
+
+    def cancel(self, key):
+        with self.cond:
+            item = self.items.get(key)
+            if not item:
+                return
+            if item.state in ('queued', 'paused'):
+                item.state = 'cancelled'
+            elif item.state == 'downloading':
+                item.stop_request = 'cancel'
+                return
+            else:
+                return
+            self.notify(item)
+
+    def checkpoint(self, item):
+        if item.stop_request:
+            raise DownloadInterrupted(item.stop_request)
+
+    def next_item(self):
+        # Caller holds the lock. Items whose host is at its cap stay in the heap for a later pass.
+        deferred = []
+        found = None
+        while self.heap:
+            priority, seq, key = heapq.heappop(self.heap)
+            item = self.items.get(key)
+            if not item or item.state != 'queued' or (priority, seq) != (item.priority, item.seq):
+                continue
+            if self.host_active.get(item.host, 0) >= self.per_host:
+                deferred.append((priority, seq, key))
+                continue
+            found = item
+            break
+        for entry in deferred:
+            heapq.heappush(self.heap, entry)
+        return found
+
+    def run_worker(self):
+        while True:
+            with self.cond:
+                item = self.next_item()
+                while item is None:
+                    self.cond.wait()
+                    item = self.next_item()
+                item.state = 'downloading'
+                item.stop_request = None
+                self.host_active[item.host] = self.host_active.get(item.host, 0) + 1
+                started = time.time()
+                item.timings['wait'] = started - item.queued_at
+                self.notify(item)
+
+            try:
+                result = self.worker(item)
+                outcome, error = ('processing' if isinstance(result, Future) else 'done'), None
+            except Exception as e:
+                outcome, error = 'failed', e
+            item.timings['download'] = time.time() - started
+
+            with self.cond:
+                self.host_active[item.host] -= 1
+                # A stop request only counts if it actually interrupted the worker.
+                if outcome == 'failed' and item.stop_request == 'pause':
+                    outcome, error = 'paused', None
+                elif outcome == 'failed' and item.stop_request == 'cancel':
+                    outcome, error = 'cancelled', None
+                item.state, item.error, item.stop_request = outcome, error, None
+                self.cond.notify_all()
+                self.notify(item)
+            if outcome == 'processing':
+                result.add_done_callback(lambda future, item=item: self.processed(item, future))
+
+    def processed(self, item, future):
+        error = future.exception()
+        with self.cond:
+            item.state, item.error = ('failed', error) if error else ('done', None)
+            self.notify(item)
+
+
+def sanitize_filename(title):
+    return title.translate(INVALID_FILENAME_CHARS)
+
+
+def build_format_string(format_id, resolution):
+    # Table rows pick by height for "1080p"-style and unknown resolutions, by format ID otherwise.
+    # An empty resolution means `format_id` is already a complete yt-dlp selector (batch CLI).
+    if not resolution:
+        return format_id
+    if 'p' in resolution.lower() or resolution.lower() == 'n/a':
+        return f"bestvideo[height<={resolution.replace('p', '')}][ext=mp4]+bestaudio[ext=m4a]/best[ext=mp4]/best"
+    return f"{format_id}+bestaudio/best"
+
+
+def extract_flat_info(url):
+    # A flat extraction only lists playlist entries, which is fast enough to show right away.
+    with yt_dlp.YoutubeDL({'quiet': True, 'extract_flat': 'in_playlist', 'skip_download': True}) as ydl:
+        return ydl.extract_info(url, download=False)
+
+
+class DownloadEngine:
+    # Everything the downloader does without a UI: cached format listing, the download queue,
+    # yt-dlp and ranged transfers, post-processing and the journal. The Tk app and the batch CLI
+    # are both clients. `on_update(item)` fires from worker threads on state changes; progress
+    # is read by draining `engine.progress`. `extractor` / `flat_extractor` replace yt-dlp
+    # extraction (url -> info dict), e.g. with a stub.
+    def __init__(self, folder=None, on_update=None, max_workers=MAX_CONCURRENT_DOWNLOADS,
+                 per_host=MAX_DOWNLOADS_PER_HOST, journal_path=JOURNAL_FILE, cache=None,
+                 extractor=None, flat_extractor=None, postprocess_workers=POSTPROCESS_WORKERS, quiet=False):
+        self.folder = folder
+        self.on_update = on_update or (lambda item: None)
+        self.journal = DownloadJournal(journal_path) if journal_path else None
+        self.format_cache = cache or FormatCache()
+        self.extractor = extractor or self.extract_video
+        self.flat_extractor = flat_extractor or extract_flat_info
+        self.quiet = quiet
+        self.progress = ProgressAggregator()
+        self.ydl_local = local()
+        self.postprocess_workers = postprocess_workers
+        self.postprocessor = None
+        self.manager = DownloadManager(self.download, self.item_updated, max_workers, per_host, self.journal)
+
+    def item_updated(self, item):
+        if item.state != 'downloading':
+            self.progress.forget(item.key)
+        self.on_update(item)
+
+    def list(self, url, on_refresh=None):
+        return self.format_cache.get(url, self.flat_extractor, on_refresh=on_refresh)
+
+    def video_info(self, url, cache_key=None, on_refresh=None):
+        return self.format_cache.get(url, self.extractor, cache_key, on_refresh=on_refresh)
+
+    def extract_video(self, url):
+        # YoutubeDL isn't thread-safe, so each thread keeps its own instance.
+        ydl = getattr(self.ydl_local, 'ydl', None)
+        if ydl is None:
+            ydl = self.ydl_local.ydl = yt_dlp.YoutubeDL({'quiet': True, 'skip_download': True})
+        return ydl.extract_info(url, download=False)
+
+    def submit(self, video_url, values, priority=0, folder=None):
+        # `values` is a table row: (title, format ID or selector, resolution, size).
+        key = job_key(video_url, values[1])
+        # Already downloaded and the file is still there: record it as done instead of fetching it again.
+        existing = self.journal.completed_path(key) if self.journal else None
+        self.manager.enqueue(key, video_url, tuple(values), priority, folder or self.folder, completed=existing)
+        return key
+
+    def restore(self):
+        pending = self.journal.pending() if self.journal else []
+        for job in pending:
+            self.manager.enqueue(job['key'], job['url'], job['values'], job['priority'], job['folder'],
+                                 paused=job['state'] == 'paused', restored=job)
+        return pending
+
+    def idle(self, include_paused=True):
+        # With include_paused=False, paused items (e.g. restored from the GUI's journal) don't keep it busy.
+        waiting = ACTIVE_STATES if include_paused else tuple(state for state in ACTIVE_STATES if state != 'paused')
+        with self.manager.cond:
+            return not any(item.state in waiting for item in self.manager.items.values())
+
+    def pool(self):
+        if self.postprocessor is None:
+            # spawn: the pool starts while download threads hold locks, which fork would copy
+            self.postprocessor = ProcessPoolExecutor(self.postprocess_workers,
+                                                     mp_context=multiprocessing.get_context("spawn"))
+        return self.postprocessor
+
+    def shutdown(self):
+        if self.postprocessor:
+            self.postprocessor.shutdown(wait=True)
+
+    def download(self, item):
+        item_id, url, values = item.key, item.url, item.values
+        folder = item.folder or self.folder
+
+        # '%' would otherwise be read as an output-template field; no title lets yt-dlp name the file.
+        title_for_filename = sanitize_filename(values[0]).replace('%', '%%') or "%(title)s"
+        output_template = os.path.join(folder, f"{title_for_filename}.%(ext)s")
+        direct = is_direct_media(url)
+
+        seen_bytes = {}
+
+        def progress_hook(d):
+            self.manager.checkpoint(item)
+            if d['status'] == 'downloading':
+                total_bytes = d.get('total_bytes') or d.get('total_bytes_estimate')
+                downloaded_bytes = d.get('downloaded_bytes', 0)
+                # yt-dlp reports cumulative bytes per file; charge only the new ones to the shared limiter.
+                # (The ranged downloader charges its own reads.)
+                if not direct:
+                    key = d.get('filename')
+                    bandwidth.consume(max(0, downloaded_bytes - seen_bytes.get(key, 0)))
+                    seen_bytes[key] = downloaded_bytes
+                if downloaded_bytes:
+                    self.progress.report(item_id, downloaded_bytes, total_bytes)
+                    self.manager.save_progress(item, downloaded_bytes, total_bytes)
+
+        def post_hook(path):
+            item.output_path = path
+
+        ydl_opts = {
+            'format': build_format_string(values[1], values[2]),
+            'outtmpl': output_template,
+            'noplaylist': True,
+            'continuedl': True,
+            'quiet': self.quiet,
+            'noprogress': self.quiet,
+            'merge_output_format': 'mp4',
+            'progress_hooks': [progress_hook],
+            'post_hooks': [post_hook],
+            'retries': 3,
+            'concurrent_fragment_downloads': FRAGMENT_CONNECTIONS,
+            'nooverwrites': True,
+            'ffmpeg_location': FFMPEG,
+        }
+
+        if direct:
+            # A plain file URL: nothing to merge or convert, so split it into parallel ranges ourselves.
+            # Its segment offsets are journaled, so an interrupted download continues where it stopped.
+            if item.segments is None:
+                item.segments = []
+            name, ext = os.path.splitext(os.path.basename(urlparse(url).path))
+            item.output_path = os.path.join(folder, (sanitize_filename(values[0]) or name) + ext)
+            download_ranged(url, item.output_path, progress_hook=progress_hook, segments=item.segments)
+        else:
+            # Pausing aborts the transfer; 'continuedl' picks the .part file back up on resume.
+            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+                ydl.download([url])
+        item.segments = None
+        if not item.output_path or not os.path.exists(item.output_path):
+            return None
+
+        # Conversion and hashing go to the process pool so this download slot is free for the next item.
+        submitted = time.time()
+        finished = Future()
+
+        def converted(future):
+            try:
+                result = future.result()
+                item.timings['convert_wait'] = result['started'] - submitted
+                if result['action'] != 'none':
+                    item.timings[result['action']] = result['convert']
+                item.timings['hash'] = result['hash_time']
+                item.output_path, item.content_hash = result['path'], result['hash']
+                # The same content can arrive under another URL or format ID; keep only the first copy.
+                original = self.journal.path_for_hash(item.content_hash, item_id) if self.journal else None
+                if original and os.path.abspath(original) != os.path.abspath(item.output_path):
+                    os.remove(item.output_path)
+                    item.output_path, item.note = original, 'duplicate'
+                finished.set_result(item.output_path)
+            except Exception as e:
+                finished.set_exception(e)
+
+        self.pool().submit(postprocess_file, item.output_path, not direct).add_done_callback(converted)
+        return finished
+
+
+class VideoDownloaderApp(tk.Tk if tk else object):
     def __init__(self):
         super().__init__()
         self.title("Smart Video Downloader")
@@ -17,13 +996,43 @@ class VideoDownloaderApp(tk.Tk):
         self.configure(bg="#1e1e1e")
 
         self.url_var = tk.StringVar()
-        self.sort_column = None
-        self.sort_ascending = True
-        self.downloading_rows = {}
+        self.limit_var = tk.StringVar(value=str(BANDWIDTH_LIMIT // (1024 * 1024)))
+        self.sort_spec = []  # [(column, ascending)], primary first
+        self.format_rows = {}  # row key -> FormatRow, for every row including filtered-out ones
+        self.row_filter = None
+        self.render_pending = False
+        self.filter_job = None
+        self.placeholder_order = {}
+        self.filter_var = tk.StringVar()
+        # State changes arrive under the manager's lock, so they're only queued here and applied
+        # by the flush loop on the Tk thread.
+        self.updates = queue.Queue()
+        self.engine = DownloadEngine(on_update=self.updates.put)
+        self.downloads = self.engine.manager
+        self.progress = self.engine.progress
         self.download_folder = None
+        self.row_count = 0
+        self.fetch_generation = 0
+        self.resolver = None
+        self.resolve_progress = [0, 0]
 
         self.setup_style()
         self.build_input_frame()
+        self.after(PROGRESS_FLUSH_MS, self.flush_progress)
+        self.restore_downloads()
+
+    def restore_downloads(self):
+        pending = self.engine.restore()
+        if not pending:
+            return
+        self.build_results_table()
+        for job in pending:
+            tag = 'evenrow' if self.row_count % 2 == 0 else 'oddrow'
+            row = FormatRow.from_values(job['key'], job['url'], job['values'], (-1, self.row_count))
+            self.format_rows[row.key] = row
+            self.tree.insert("", "end", iid=row.key, values=row.values(), tags=(tag, job['url']))
+            self.row_count += 1
+        self.loading_label.config(text=f"Restored {len(pending)} download(s) from the last session.")
 
     def setup_style(self):
         self.style = ttk.Style(self)
@@ -46,172 +1055,506 @@ class VideoDownloaderApp(tk.Tk):
         ttk.Button(self.input_frame, text="Select Folder", command=self.select_download_folder).pack(side='left', padx=5)
         ttk.Button(self.input_frame, text="Fetch Formats", command=self.fetch_info_thread).pack(side='left', padx=5)
 
+        ttk.Label(self.input_frame, text="Max MB/s (0 = off):").pack(side='left', padx=(10, 5))
+        limit_box = ttk.Spinbox(self.input_frame, from_=0, to=1000, width=5, textvariable=self.limit_var,
+                                command=self.apply_bandwidth_limit)
+        limit_box.pack(side='left')
+        limit_box.bind("<Return>", lambda event: self.apply_bandwidth_limit())
+        limit_box.bind("<FocusOut>", lambda event: self.apply_bandwidth_limit())
+
         self.loading_label = ttk.Label(self, text="", font=('Segoe UI', 10, 'italic'))
         self.loading_label.pack(pady=(5, 0))
 
+    def apply_bandwidth_limit(self):
+        try:
+            mbps = max(0.0, float(self.limit_var.get()))
+        except ValueError:
+            return
+        bandwidth.set_rate(int(mbps * 1024 * 1024))
+
     def select_download_folder(self):
         folder = filedialog.askdirectory(title="Select Download Folder")
         if folder:
             self.download_folder = folder
 
     def build_results_table(self):
-        self.geometry("880x500")
+        self.geometry("980x500")
 
         self.tree = ttk.Treeview(self, columns=("title", "format", "resolution", "filesize", "status"),
                                  show="headings", height=15)
         for col in self.tree["columns"]:
-            self.tree.heading(col, text=col.title(), command=lambda _col=col: self.sort_by_column(_col))
+            self.tree.heading(col, text=col.title())  # clicks are handled in on_tree_click (Shift adds a sort column)
 
         self.tree.column("title", width=300)
         self.tree.column("format", width=80, anchor='center')
         self.tree.column("resolution", width=100, anchor='center')
         self.tree.column("filesize", width=100, anchor='center')
-        self.tree.column("status", width=100, anchor='center')
+        self.tree.column("status", width=200, anchor='center')
 
         self.tree.tag_configure('evenrow', background="#2e2e2e")
         self.tree.tag_configure('oddrow', background="#252526")
 
+        filter_frame = ttk.Frame(self)
+        filter_frame.pack(fill='x', padx=20, pady=(10, 0))
+        ttk.Label(filter_frame, text="Filter:").pack(side='left', padx=(0, 5))
+        ttk.Entry(filter_frame, textvariable=self.filter_var, width=40).pack(side='left')
+        self.filter_status = ttk.Label(filter_frame, text="e.g. mp4 and height>=1080")
+        self.filter_status.pack(side='left', padx=10)
+        self.filter_var.trace_add('write', lambda *args: self.schedule_filter())
+
         self.tree.pack(fill='both', expand=True, padx=20, pady=(10, 10))
         self.tree.bind("<Button-1>", self.on_tree_click)
+        self.tree.bind("<Button-3>", self.on_tree_right_click)
 
-    def fetch_info_thread(self):
-        Thread(target=self.fetch_info).start()
+        self.row_menu = tk.Menu(self, tearoff=0)
+        self.row_menu.add_command(label="Download Next", command=lambda: self.row_action('first'))
+        self.row_menu.add_command(label="Pause", command=lambda: self.row_action('pause'))
+        self.row_menu.add_command(label="Resume", command=lambda: self.row_action('resume'))
+        self.row_menu.add_command(label="Cancel", command=lambda: self.row_action('cancel'))
+        self.menu_row = None
 
-    def fetch_info(self):
-        self.loading_label.config(text="Fetching formats, please wait...")
+    def fetch_info_thread(self):
+        # Validated here on the Tk thread; the worker only touches widgets through self.after.
         self.url = self.url_var.get().strip()
         if not self.url:
             messagebox.showerror("Input Error", "Please enter a valid URL.")
-            self.loading_label.config(text="")
             return
         if not self.download_folder:
             messagebox.showwarning("Folder Required", "Please select a download folder first.")
+            return
+        self.loading_label.config(text="Fetching formats, please wait...")
+        Thread(target=self.fetch_info).start()
+
+    def fetch_info(self):
+        # Phase one: a flat listing, so playlist entries show up right away.
+        try:
+            info = self.engine.list(self.url, on_refresh=lambda fresh: self.after(0, lambda: self.refresh_video_rows(fresh)))
+        except Exception as e:
+            msg = f"Failed to fetch info:\n{e}"
+            self.after(0, lambda msg=msg: messagebox.showerror("Error", msg))
+            self.after(0, lambda: self.loading_label.config(text=""))
+            return
+        self.after(0, lambda: self.show_results(info))
+
+    def show_results(self, info):
+        if not hasattr(self, 'tree'):
+            self.build_results_table()
+        else:
+            # Filtered-out rows are detached rather than children, so delete them by key too.
+            stale = set(self.tree.get_children()) | {key for key in self.format_rows if self.tree.exists(key)}
+            self.tree.delete(*stale)
+        self.format_rows.clear()
+        self.placeholder_order.clear()
+        self.row_count = 0
+        self.fetch_generation += 1
+        if self.resolver:
+            self.resolver.shutdown(wait=False, cancel_futures=True)
+            self.resolver = None
+
+        if 'entries' not in info:
+            self.insert_video_rows(info, 'end', 0)
             self.loading_label.config(text="")
             return
 
+        # Phase two: resolve each entry's formats in a bounded pool; rows replace placeholders as they land.
+        entries = [entry for entry in info['entries'] if entry]
+        generation = self.fetch_generation
+        self.resolve_progress = [0, len(entries)]
+        self.resolver = ThreadPoolExecutor(max_workers=PLAYLIST_WORKERS)
+        for index, entry in enumerate(entries):
+            title = (entry.get('title') or entry.get('id') or 'Unknown')[:50]
+            placeholder = self.tree.insert("", "end", values=(title, "", "", "", "Resolving..."),
+                                           tags=('pending',))
+            self.placeholder_order[placeholder] = index
+            entry_url = entry.get('webpage_url') or entry.get('url') or self.url
+            cache_key = f"{entry['ie_key']}:{entry['id']}" if entry.get('ie_key') and entry.get('id') else None
+            self.resolver.submit(self.resolve_entry, generation, placeholder, entry_url, cache_key)
+        self.update_resolve_label()
+
+    def resolve_entry(self, generation, placeholder, entry_url, cache_key=None):
+        if generation != self.fetch_generation:
+            return
         try:
-            ydl_opts = {
-                'quiet': True,
-                'extract_flat': False,
-                'skip_download': True,
-                'forcejson': True,
-            }
+            video = self.engine.video_info(
+                entry_url, cache_key, on_refresh=lambda fresh: self.after(0, lambda: self.refresh_video_rows(fresh)))
+        except Exception:
+            self.after(0, lambda: self.entry_resolved(generation, placeholder, None))
+            return
+        self.after(0, lambda: self.entry_resolved(generation, placeholder, video))
 
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                info = ydl.extract_info(self.url, download=False)
+    def entry_resolved(self, generation, placeholder, video):
+        if generation != self.fetch_generation or not self.tree.exists(placeholder):
+            return
+        self.resolve_progress[0] += 1
+        if video is None:
+            self.tree.set(placeholder, "status", "❌ Unavailable")
+        else:
+            self.insert_video_rows(video, self.tree.index(placeholder), self.placeholder_order.pop(placeholder, 0))
+            self.tree.delete(placeholder)
+        self.update_resolve_label()
 
-            if not hasattr(self, 'tree'):
-                self.build_results_table()
-            else:
-                for row in self.tree.get_children():
-                    self.tree.delete(row)
-
-            entries = info['entries'] if 'entries' in info else [info]
-            index = 0
-            for video in entries:
-                title = video.get('title', 'Unknown')[:50]
-                video_url = video.get('webpage_url', self.url)
-                formats = video.get('formats', [])
-
-                for fmt in formats:
-                    fmt_id = fmt.get('format_id')
-                    res = fmt.get('resolution') or fmt.get('format_note') or f"{fmt.get('width', '')}x{fmt.get('height', '')}"
-                    size = fmt.get('filesize')
-                    size_mb = f"{size / (1024 * 1024):.2f}" if size else "N/A"
-                    tag = 'evenrow' if index % 2 == 0 else 'oddrow'
-
-                    display_title = title
-                    iid = self.tree.insert("", "end",
-                                           values=(display_title, fmt_id, res, size_mb, ""),
-                                           tags=(tag, video_url))
-                    index += 1
+    def refresh_video_rows(self, video):
+        # A background refresh finished: swap that video's rows in place, unless it is downloading.
+        if 'entries' in video or not hasattr(self, 'tree'):
+            return
+        video_url = video.get('webpage_url') or self.url
+        rows = [row for row in self.tree.tag_has(video_url) if self.tree.exists(row)]
+        if not rows or any(self.downloads.is_active(row) for row in rows):
+            return
+        position = min(self.tree.index(row) for row in rows)
+        entry_index = min((self.format_rows[row].order[0] for row in rows if row in self.format_rows), default=0)
+        for row in rows:
+            self.tree.delete(row)
+            self.format_rows.pop(row, None)
+        self.insert_video_rows(video, position, entry_index)
 
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to fetch info:\n{e}")
-        finally:
-            self.loading_label.config(text="")
+    def update_resolve_label(self):
+        done, total = self.resolve_progress
+        self.loading_label.config(text="" if done >= total else f"Resolved {done}/{total} videos...")
 
-    def sort_by_column(self, col):
-        data = [(self.tree.set(k, col), k) for k in self.tree.get_children("")]
+    def insert_video_rows(self, video, position, entry_index):
+        title = (video.get('title') or 'Unknown')[:50]
+        video_url = video.get('webpage_url') or self.url
+        formats = video.get('formats') or []
+
+        for fmt_index, fmt in enumerate(formats):
+            key = job_key(video_url, fmt.get('format_id'))
+            if self.tree.exists(key):
+                continue  # same video listed twice
+            row = self.format_rows[key] = FormatRow(key, video_url, title, fmt, (entry_index, fmt_index))
+            tag = 'evenrow' if self.row_count % 2 == 0 else 'oddrow'
+
+            status = ""
+            if self.downloads.state(key) is not None:
+                status = self.status_label(self.downloads.items[key])
+            self.tree.insert("", position, iid=key, values=row.values(status), tags=(tag, video_url))
+            if position != 'end':
+                position += 1
+            self.row_count += 1
+        if self.sort_spec or self.row_filter:
+            self.schedule_render()
+
+    def sort_by_column(self, col, add=False):
+        # Plain click sorts by one column (again to reverse); Shift+click adds or flips a tie-breaker.
+        current = dict(self.sort_spec)
+        if add and col in current:
+            self.sort_spec = [(c, not asc if c == col else asc) for c, asc in self.sort_spec]
+        elif add:
+            self.sort_spec.append((col, True))
+        elif self.sort_spec and self.sort_spec[0][0] == col and len(self.sort_spec) == 1:
+            self.sort_spec = [(col, not self.sort_spec[0][1])]
+        else:
+            self.sort_spec = [(col, True)]
+        for column in self.tree["columns"]:
+            self.tree.heading(column, text=column.title())
+        for rank, (column, ascending) in enumerate(self.sort_spec, 1):
+            marker = ("▲" if ascending else "▼") + (str(rank) if len(self.sort_spec) > 1 else "")
+            self.tree.heading(column, text=f"{column.title()} {marker}")
+        self.render_rows()
+
+    def schedule_filter(self):
+        if self.filter_job:
+            self.after_cancel(self.filter_job)
+        self.filter_job = self.after(250, self.apply_filter)
+
+    def apply_filter(self):
+        self.filter_job = None
+        text = self.filter_var.get().strip()
         try:
-            if col == "filesize":
-                data.sort(key=lambda t: float(t[0].replace('N/A', '0')), reverse=not self.sort_ascending)
+            self.row_filter = compile_filter(text) if text else None
+        except ValueError as e:
+            self.filter_status.config(text=f"⚠ {e}")
+            return
+        self.render_rows()
+        if self.row_filter:
+            shown = sum(1 for row in self.format_rows.values() if self.row_filter(row))
+            self.filter_status.config(text=f"{shown} of {len(self.format_rows)} formats")
+        else:
+            self.filter_status.config(text="e.g. mp4 and height>=1080")
+
+    def schedule_render(self):
+        # Playlist rows land in bursts; re-sort once per idle period rather than per video.
+        if not self.render_pending:
+            self.render_pending = True
+            self.after_idle(self.render_rows)
+
+    def render_rows(self):
+        # Sorting and filtering happen on the model; the Treeview gets the new row list in a
+        # single set_children call. Rows filtered out are detached, not deleted.
+        self.render_pending = False
+        rows = sorted(self.format_rows.values(), key=lambda row: row.order)
+        if self.row_filter:
+            rows = [row for row in rows if self.row_filter(row)]
+        for col, ascending in reversed(self.sort_spec):
+            if col == 'status':
+                statuses = {row.key: self.tree.set(row.key, 'status') for row in rows}
+                rows.sort(key=lambda row: statuses[row.key], reverse=not ascending)
             else:
-                data.sort(reverse=not self.sort_ascending)
-        except ValueError:
-            data.sort(reverse=not self.sort_ascending)
-        for index, (val, k) in enumerate(data):
-            self.tree.move(k, '', index)
-        self.sort_ascending = not self.sort_ascending
-        self.sort_column = col
+                rows.sort(key=lambda row: row.sort_keys[col], reverse=not ascending)
+        placeholders = [item for item in self.tree.get_children() if item not in self.format_rows]
+        self.tree.set_children('', *(row.key for row in rows), *placeholders)
 
     def on_tree_click(self, event):
+        if self.tree.identify_region(event.x, event.y) == "heading":
+            col = self.tree.column(self.tree.identify_column(event.x), 'id')
+            self.sort_by_column(col, add=bool(event.state & 0x0001))
+            return
+
         item_id = self.tree.identify_row(event.y)
         col = self.tree.identify_column(event.x)
 
-        if col != "#1" or not item_id:
+        if col != "#1" or not item_id or 'pending' in self.tree.item(item_id, "tags"):
             return
 
-        if self.downloading_rows.get(item_id):
+        if self.downloads.is_active(item_id):
             messagebox.showinfo("Already Downloading", "This item is already being downloaded.")
             return
 
         values = self.tree.item(item_id, "values")
         video_url_from_tags = self.tree.item(item_id, "tags")[1]
+        self.engine.submit(video_url_from_tags, values, folder=self.download_folder)
 
-        Thread(target=self.download_video, args=(item_id, video_url_from_tags, values)).start()
-        self.downloading_rows[item_id] = True
-        self.tree.set(item_id, "status", "Downloading...")
+    def on_tree_right_click(self, event):
+        item_id = self.tree.identify_row(event.y)
+        if not item_id or self.downloads.state(item_id) is None:
+            return
+        self.menu_row = item_id
+        state = self.downloads.state(item_id)
+        self.row_menu.entryconfig("Download Next", state='normal' if state == 'queued' else 'disabled')
+        self.row_menu.entryconfig("Pause", state='normal' if state in ('queued', 'downloading') else 'disabled')
+        self.row_menu.entryconfig("Resume", state='normal' if state == 'paused' else 'disabled')
+        self.row_menu.entryconfig("Cancel", state='normal' if state in ('queued', 'downloading', 'paused') else 'disabled')
+        self.row_menu.tk_popup(event.x_root, event.y_root)
 
+    def row_action(self, action):
+        key = self.menu_row
+        if action == 'first':
+            self.downloads.set_priority(key, -1)
+        elif action == 'pause':
+            self.downloads.pause(key)
+        elif action == 'resume':
+            self.downloads.resume(key)
+        elif action == 'cancel':
+            self.downloads.cancel(key)
 
-    def download_video(self, item_id, url, values):
-        selected_fmt_id = values[1]
-        selected_resolution = values[2]
+    def status_label(self, item):
+        if item.state == 'done' and item.note == 'existing':
+            return "✅ Already downloaded"
+        if item.state == 'done' and item.note == 'duplicate':
+            return "✅ Duplicate (kept existing)"
+        if item.state == 'done' and 'download' in item.timings:
+            stages = [f"dl {item.timings['download']:.0f}s"]
+            stages += [f"{stage} {item.timings[stage]:.0f}s" for stage in ('remux', 'encode') if stage in item.timings]
+            return "✅ " + " · ".join(stages)
+        labels = {'queued': "Queued", 'downloading': "Downloading...", 'processing': "⚙ Converting...",
+                  'paused': "⏸ Paused", 'done': "✅ Downloaded", 'failed': "❌ Failed", 'cancelled': "Cancelled"}
+        return labels[item.state]
 
-        title_for_filename = values[0].replace('/', '_').replace('\\', '_').replace(':', '_').replace('*', '_').replace('?', '_').replace('"', '_').replace('<', '_').replace('>', '_').replace('|', '_')
-        output_template = os.path.join(self.download_folder, f"{title_for_filename}.%(ext)s")
+    def download_updated(self, item):
+        if not hasattr(self, 'tree') or not self.tree.exists(item.key):
+            return
+        self.tree.set(item.key, "status", self.status_label(item))
+        if item.state == 'failed':
+            messagebox.showerror("Download Failed", f"Error downloading {item.values[0]}:\n{item.error}")
 
-        def progress_hook(d):
-            if d['status'] == 'downloading':
-                total_bytes = d.get('total_bytes') or d.get('total_bytes_estimate')
-                downloaded_bytes = d.get('downloaded_bytes', 0)
-                if total_bytes and downloaded_bytes:
-                    progress_percent = downloaded_bytes / total_bytes * 100
-                    self.after(0, lambda: self.tree.set(item_id, "status", f"{progress_percent:.1f}%"))
-            elif d['status'] == 'finished':
-                self.after(0, lambda: self.tree.set(item_id, "status", "✅ Downloaded"))
-
-        if 'p' in selected_resolution.lower() or selected_resolution.lower() == 'n/a':
-            format_string = f"bestvideo[height<={selected_resolution.replace('p', '')}][ext=mp4]+bestaudio[ext=m4a]/best[ext=mp4]/best"
+    def flush_progress(self):
+        while True:
+            try:
+                self.download_updated(self.updates.get_nowait())
+            except queue.Empty:
+                break
+        for key, snapshot in self.progress.drain().items():
+            if hasattr(self, 'tree') and self.tree.exists(key) and self.downloads.state(key) == 'downloading':
+                self.tree.set(key, "status", format_progress(*snapshot))
+        self.after(PROGRESS_FLUSH_MS, self.flush_progress)
+
+
+class _RangeHandler(BaseHTTPRequestHandler):
+    # Serves an in-memory payload with Range support; `per_connection_rate` (bytes/sec) mimics
+    # CDNs that throttle each connection, which is where splitting a file pays off.
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def __init__(self, *args, payload=b"", per_connection_rate=0, honor_ranges=True, **kwargs):
+        self.payload = payload
+        self.per_connection_rate = per_connection_rate
+        self.honor_ranges = honor_ranges  # False mimics servers that advertise ranges but always send it all
+        super().__init__(*args, **kwargs)
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_payload_headers(self):
+        start, end = 0, len(self.payload) - 1
+        header = self.headers.get("Range")
+        if header and header.startswith("bytes=") and self.honor_ranges:
+            first, _, last = header[6:].partition("-")
+            start, end = int(first), min(int(last) if last else end, end)
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{end}/{len(self.payload)}")
         else:
-            format_string = f"{selected_fmt_id}+bestaudio/best"
+            self.send_response(200)
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("Content-Length", str(end - start + 1))
+        self.end_headers()
+        return start, end
 
-        ydl_opts = {
-            'format': format_string,
-            'outtmpl': output_template,
-            'noplaylist': True,
-            'continuedl': True,
-            'quiet': False,
-            'merge_output_format': 'mp4',
-            'progress_hooks': [progress_hook],
-            'retries': 3,
-            'nooverwrites': True,
-            'ffmpeg_location': 'ffmpeg',
-            'postprocessors': [{
-                'key': 'FFmpegVideoConvertor',
-                'preferedformat': 'mp4',
-            }],
-        }
+    def do_HEAD(self):
+        self.send_payload_headers()
 
+    def do_GET(self):
+        start, end = self.send_payload_headers()
+        limiter = BandwidthLimiter(self.per_connection_rate, burst=64 * 1024)
         try:
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                ydl.download([url])
+            for offset in range(start, end + 1, 64 * 1024):
+                block = self.payload[offset:min(end + 1, offset + 64 * 1024)]
+                limiter.consume(len(block))
+                self.wfile.write(block)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+
+def run_range_benchmark(size_mb=64, chunk_counts=(1, 2, 4, 8), per_connection_mbps=0, limit_mbps=0):
+    payload = os.urandom(size_mb * 1024 * 1024)
+    handler = functools.partial(_RangeHandler, payload=payload,
+                                per_connection_rate=int(per_connection_mbps * 1024 * 1024))
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    server.daemon_threads = True
+    Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/bench.mp4"
+    results = []
+    try:
+        with tempfile.TemporaryDirectory() as folder:
+            for chunks in chunk_counts:
+                path = os.path.join(folder, f"bench-{chunks}.mp4")
+                limiter = BandwidthLimiter(int(limit_mbps * 1024 * 1024), burst=RANGE_BLOCK_SIZE)
+                started = time.perf_counter()
+                size = download_ranged(url, path, connections=chunks, limiter=limiter)
+                elapsed = time.perf_counter() - started
+                with open(path, "rb") as f:
+                    intact = f.read() == payload
+                os.remove(path)
+                results.append({"chunks": chunks, "bytes": size, "elapsed": elapsed,
+                                "mb_per_sec": size / (1024 * 1024) / elapsed, "intact": intact})
+    finally:
+        server.shutdown()
+        server.server_close()
+    return results
+
+
+def format_range_benchmark(results):
+    lines = [f"{'Chunks':>6}{'MB':>8}{'Seconds':>9}{'MB/s':>9}{'Intact':>8}"]
+    for r in results:
+        lines.append(f"{r['chunks']:>6}{r['bytes'] / (1024 * 1024):>8.1f}{r['elapsed']:>9.2f}"
+                     f"{r['mb_per_sec']:>9.1f}{'yes' if r['intact'] else 'NO':>8}")
+    return "\n".join(lines)
+
+
+def read_url_file(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith("#")]
+
+
+def run_batch(urls, folder, concurrency, per_host, selector, journal_path, out=sys.stdout, engine_options=None):
+    # Downloads every URL (playlists are expanded) and writes one JSON object per line to `out`:
+    # "queued"/"state" events on every state change, "progress" events twice a second per active
+    # download and a final "summary". Returns the number of failed downloads plus URLs that yielded none.
+    print_lock = Lock()
+
+    def emit(event):
+        with print_lock:
+            out.write(json.dumps(event) + "\n")
+            out.flush()
+
+    def on_update(item):
+        event = {'event': 'state', 'key': item.key, 'url': item.url, 'state': item.state}
+        if item.state == 'failed':
+            event['error'] = str(item.error)
+        if item.state == 'done':
+            event.update(path=item.output_path, note=item.note,
+                         timings={stage: round(seconds, 3) for stage, seconds in item.timings.items()})
+        emit(event)
+
+    engine = DownloadEngine(folder, on_update, max_workers=concurrency, per_host=per_host,
+                            journal_path=journal_path, quiet=True, **(engine_options or {}))
+    engine.restore()
+    unlisted = 0
+    for url in urls:
+        if is_direct_media(url):
+            engine.submit(url, ("", "direct", "", "N/A"))
+            continue
+        try:
+            info = engine.list(url)
         except Exception as e:
-            self.after(0, lambda: self.tree.set(item_id, "status", "❌ Failed"))
-            self.after(0, lambda: messagebox.showerror("Download Failed", f"Error downloading {values[0]}:\n{e}"))
-        finally:
-            self.downloading_rows[item_id] = False
+            emit({'event': 'error', 'url': url, 'error': str(e)})
+            unlisted += 1
+            continue
+        entries = [entry for entry in info['entries'] if entry] if 'entries' in info else [info]
+        if not entries:
+            emit({'event': 'error', 'url': url, 'error': "playlist has no entries"})
+            unlisted += 1
+            continue
+        for entry in entries:
+            entry_url = entry.get('webpage_url') or entry.get('url') or url
+            engine.submit(entry_url, (entry.get('title') or "", selector, "", "N/A"))
+
+    try:
+        # Paused jobs restored from the journal stay paused; waiting for them would never end.
+        while not engine.idle(include_paused=False):
+            time.sleep(0.5)
+            for key, (downloaded, total, speed, eta) in engine.progress.drain().items():
+                emit({'event': 'progress', 'key': key, 'downloaded': downloaded, 'total': total,
+                      'speed': round(speed) if speed else None, 'eta': round(eta, 1) if eta is not None else None})
+    finally:
+        engine.shutdown()
+    states = [item.state for item in engine.manager.items.values()]
+    emit({'event': 'summary', 'done': states.count('done'), 'failed': states.count('failed'),
+          'cancelled': states.count('cancelled'), 'paused': states.count('paused')})
+    return states.count('failed') + unlisted
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(prog="Video Downloader.py", description="Video Downloader without the GUI.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    batch = commands.add_parser("batch", help="download every URL in a file, printing JSON progress lines")
+    batch.add_argument("url_file", help="text file with one video, playlist or file URL per line")
+    batch.add_argument("--out", default=".", help="download folder (default: current folder)")
+    batch.add_argument("--concurrency", type=int, default=MAX_CONCURRENT_DOWNLOADS,
+                       help="simultaneous downloads (default: %(default)s)")
+    batch.add_argument("--per-host", type=int, default=MAX_DOWNLOADS_PER_HOST,
+                       help="simultaneous downloads per host (default: %(default)s)")
+    batch.add_argument("--format", default=DEFAULT_FORMAT, help="yt-dlp format selector")
+    batch.add_argument("--max-height", type=int, help="best mp4 up to this height, instead of --format")
+    batch.add_argument("--limit-mbps", type=float, default=0, help="total bandwidth cap, 0 = none")
+    batch.add_argument("--journal", help="journal file, so an interrupted batch can be resumed by rerunning it")
+
+    bench = commands.add_parser("bench", help="measure ranged download throughput against a local server")
+    bench.add_argument("--size-mb", type=int, default=64)
+    bench.add_argument("--chunks", type=int, nargs="+", default=[1, 2, 4, 8])
+    bench.add_argument("--per-connection-mbps", type=float, default=0,
+                       help="server-side cap per connection, 0 = none (default: %(default)s)")
+    bench.add_argument("--limit-mbps", type=float, default=0, help="global bandwidth cap, 0 = none")
+    bench.add_argument("--json", help="also write results to this file")
+
+    args = parser.parse_args(argv)
+    if args.command == "batch":
+        os.makedirs(args.out, exist_ok=True)
+        bandwidth.set_rate(int(args.limit_mbps * 1024 * 1024))
+        selector = build_format_string("", f"{args.max_height}p") if args.max_height else args.format
+        failed = run_batch(read_url_file(args.url_file), args.out, args.concurrency, args.per_host, selector,
+                           args.journal)
+        return 1 if failed else 0
+
+    results = run_range_benchmark(args.size_mb, args.chunks, args.per_connection_mbps, args.limit_mbps)
+    print(format_range_benchmark(results))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    return 0
 
 
 if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        sys.exit(main(sys.argv[1:]))
     VideoDownloaderApp().mainloop()
\ No newline at end of file
@@ -1,15 +1,323 @@
 # title: Web Scraper
 
-import tkinter as tk
-from tkinter import ttk, messagebox, scrolledtext
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
 from bs4 import BeautifulSoup
-from urllib.parse import urljoin, urlparse
+from html.parser import HTMLParser
+from urllib.robotparser import RobotFileParser
+from urllib.parse import urljoin, urlparse, urlsplit, urlunsplit, parse_qsl, urlencode
+from email.utils import parsedate_to_datetime
+from collections import OrderedDict, Counter, deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+import multiprocessing
+import argparse
+import functools
+import random
+import tempfile
+import heapq
+import queue
+import threading
+import hashlib
+import json
+import math
 import time
 import datetime
 import re
 import os
+import sys
 import csv
+import gzip
+import sqlite3
+
+# Optional, so the scrape and bench subcommands also run on servers without Tk installed.
+try:
+    import tkinter as tk
+    from tkinter import ttk, messagebox, scrolledtext
+except ImportError:
+    tk = None
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import lxml.html
+except ImportError:
+    lxml = None
+
+try:
+    from selectolax.lexbor import LexborHTMLParser as SelectolaxParser
+except ImportError:
+    try:
+        from selectolax.parser import HTMLParser as SelectolaxParser
+    except ImportError:
+        SelectolaxParser = None
+
+# === HTTP Session ===
+
+SESSION_CONFIG = {
+    "pool_connections": 10,  # number of hosts kept in the pool
+    "pool_maxsize": 10,      # keep-alive connections per host
+    "max_retries": 2,
+    "timeout": 10,
+}
+
+_session = None
+_session_lock = threading.Lock()
+_session_stats = {"requests": 0, "connections_opened": 0, "connections_reused": 0}
+_thread_connections = threading.local()
+
+
+class _CountingConnectionMixin:
+    # Every TCP/TLS handshake goes through connect(); requests that skip it rode a keep-alive socket.
+    def connect(self):
+        _thread_connections.opened = getattr(_thread_connections, "opened", 0) + 1
+        return super().connect()
+
+
+class _CountingHTTPConnection(_CountingConnectionMixin, HTTPConnection):
+    pass
+
+
+class _CountingHTTPSConnection(_CountingConnectionMixin, HTTPSConnection):
+    pass
+
+
+class _CountingHTTPPool(HTTPConnectionPool):
+    ConnectionCls = _CountingHTTPConnection
+
+
+class _CountingHTTPSPool(HTTPSConnectionPool):
+    ConnectionCls = _CountingHTTPSConnection
+
+
+class PooledAdapter(HTTPAdapter):
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {"http": _CountingHTTPPool, "https": _CountingHTTPSPool}
+
+
+def _accept_encoding():
+    encodings = ["gzip", "deflate"]
+    try:
+        import brotli  # noqa: F401  (urllib3 decodes br when brotli is installed)
+        encodings.append("br")
+    except ImportError:
+        pass
+    return ", ".join(encodings)
+
+
+def configure_session(**options):
+    global _session
+    with _session_lock:
+        SESSION_CONFIG.update(options)
+        if _session is not None:
+            _session.close()
+            _session = None
+
+
+def get_session():
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = PooledAdapter(pool_connections=SESSION_CONFIG["pool_connections"],
+                                    pool_maxsize=SESSION_CONFIG["pool_maxsize"],
+                                    max_retries=SESSION_CONFIG["max_retries"])
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            session.headers.update({
+                'User-Agent': 'Mozilla/5.0',
+                'Accept-Encoding': _accept_encoding(),
+                'Connection': 'keep-alive',
+            })
+            _session = session
+        return _session
+
+
+def session_stats():
+    with _session_lock:
+        return dict(_session_stats)
+
+
+def _record_request(reused):
+    with _session_lock:
+        _session_stats["requests"] += 1
+        _session_stats["connections_reused" if reused else "connections_opened"] += 1
+
+# === HTTP Cache ===
+
+CACHE_CONFIG = {
+    "directory": os.path.join("scraped_data", ".http_cache"),
+    "max_bytes": 200 * 1024 * 1024,
+    "enabled": True,
+}
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def normalize_url(url):
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((scheme, host, parts.path or "/", query, ""))
+
+
+def _max_age(headers):
+    cache_control = headers.get("Cache-Control", "").lower()
+    if "no-cache" in cache_control or "no-store" in cache_control:
+        return 0
+    match = re.search(r"max-age=(\d+)", cache_control)
+    if match:
+        return int(match.group(1))
+    if "Expires" in headers and "Date" in headers:
+        try:
+            return max(0, int((parsedate_to_datetime(headers["Expires"]) -
+                               parsedate_to_datetime(headers["Date"])).total_seconds()))
+        except (TypeError, ValueError):
+            return 0
+    return 0
+
+
+class HTTPCache:
+    # Content-addressed by the normalized URL's hash: <dir>/<ab>/<hash>.body + <hash>.json.
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._index = None  # OrderedDict key -> size, least recently used first
+        self._total = 0
+
+    def _paths(self, key):
+        folder = os.path.join(self.directory, key[:2])
+        return os.path.join(folder, f"{key}.body"), os.path.join(folder, f"{key}.json")
+
+    def _load_index(self):
+        if self._index is not None:
+            return
+        entries = []
+        if os.path.isdir(self.directory):
+            for root, _, files in os.walk(self.directory):
+                for name in files:
+                    if name.endswith(".body"):
+                        stat = os.stat(os.path.join(root, name))
+                        entries.append((stat.st_mtime, name[:-5], stat.st_size))
+        entries.sort()
+        self._index = OrderedDict((key, size) for _, key, size in entries)
+        self._total = sum(self._index.values())
+
+    def lookup(self, url):
+        key = hashlib.sha256(normalize_url(url).encode("utf-8")).hexdigest()
+        body_path, meta_path = self._paths(key)
+        with self._lock:
+            self._load_index()
+            if key not in self._index:
+                return None
+            try:
+                with open(meta_path, "r", encoding="utf-8") as f:
+                    meta = json.load(f)
+                with open(body_path, "r", encoding="utf-8") as f:
+                    meta["text"] = f.read()
+                os.utime(body_path)
+            except (OSError, ValueError):
+                self._drop(key)
+                return None
+            self._index.move_to_end(key)
+        meta["key"] = key
+        return meta
+
+    def is_fresh(self, entry):
+        return time.time() - entry["stored_at"] < entry["max_age"]
+
+    def conditional_headers(self, entry):
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def store(self, url, response, text):
+        if "no-store" in response.headers.get("Cache-Control", "").lower():
+            return
+        key = hashlib.sha256(normalize_url(url).encode("utf-8")).hexdigest()
+        body_path, meta_path = self._paths(key)
+        body = text.encode("utf-8")
+        meta = {
+            "url": url,
+            "stored_at": time.time(),
+            "max_age": _max_age(response.headers),
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "headers": dict(response.headers),
+            "size": len(body),
+        }
+        with self._lock:
+            self._load_index()
+            os.makedirs(os.path.dirname(body_path), exist_ok=True)
+            with open(body_path, "wb") as f:
+                f.write(body)
+            with open(meta_path, "w", encoding="utf-8") as f:
+                json.dump(meta, f)
+            self._total += len(body) - self._index.pop(key, 0)
+            self._index[key] = len(body)
+            self._evict()
+
+    def revalidated(self, entry, response):
+        # A 304 may refresh caching headers; the stored body stays as is.
+        _, meta_path = self._paths(entry["key"])
+        entry["stored_at"] = time.time()
+        entry["max_age"] = _max_age(response.headers) or entry["max_age"]
+        entry["etag"] = response.headers.get("ETag", entry.get("etag"))
+        entry["last_modified"] = response.headers.get("Last-Modified", entry.get("last_modified"))
+        meta = {k: v for k, v in entry.items() if k not in ("text", "key")}
+        with self._lock:
+            try:
+                with open(meta_path, "w", encoding="utf-8") as f:
+                    json.dump(meta, f)
+            except OSError:
+                pass
+
+    def _drop(self, key):
+        self._total -= self._index.pop(key, 0)
+        for path in self._paths(key):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _evict(self):
+        while self._total > self.max_bytes and len(self._index) > 1:
+            self._drop(next(iter(self._index)))
+
+
+_http_cache = None
+_http_cache_lock = threading.Lock()
+
+
+def get_http_cache():
+    # Built on first use and rebuilt whenever CACHE_CONFIG (or the working directory) points elsewhere.
+    global _http_cache
+    directory = os.path.abspath(CACHE_CONFIG["directory"])
+    with _http_cache_lock:
+        wanted = (directory, CACHE_CONFIG["max_bytes"])
+        if _http_cache is None or (_http_cache.directory, _http_cache.max_bytes) != wanted:
+            _http_cache = HTTPCache(directory, CACHE_CONFIG["max_bytes"])
+        return _http_cache
+
+CACHE_STATUS_LABELS = {"hit": "cache hit", "revalidated": "304 revalidated", "miss": "full fetch"}
 
 # === Core Functions ===
 
@@ -17,39 +325,311 @@ def validate_url(url):
     return url.startswith("http://") or url.startswith("https://")
 
 def fetch_url_content(url):
-    headers = {'User-Agent': 'Mozilla/5.0'}
+    session = get_session()
+    http_cache = get_http_cache()
+    entry = http_cache.lookup(url) if CACHE_CONFIG["enabled"] else None
+    start = time.perf_counter()
+    if entry and http_cache.is_fresh(entry):
+        return entry["text"], time.perf_counter() - start, None, {"cache": "hit", "connection_reused": None,
+                                                                  "bytes": 0}
     try:
-        start = time.perf_counter()
-        response = requests.get(url, headers=headers, timeout=10)
+        opened_before = getattr(_thread_connections, "opened", 0)
+        headers = http_cache.conditional_headers(entry) if entry else {}
+        response = session.get(url, headers=headers, timeout=SESSION_CONFIG["timeout"])
         request_duration = time.perf_counter() - start
+        reused = getattr(_thread_connections, "opened", 0) == opened_before
+        _record_request(reused)
+        if response.status_code == 304 and entry:
+            http_cache.revalidated(entry, response)
+            return entry["text"], request_duration, None, {"cache": "revalidated", "connection_reused": reused,
+                                                           "bytes": 0}
         response.raise_for_status()
-        return response.text, request_duration, None
+        text = response.text
+        if CACHE_CONFIG["enabled"]:
+            http_cache.store(url, response, text)
+        return text, request_duration, None, {"cache": "miss", "connection_reused": reused,
+                                              "bytes": len(response.content)}
     except requests.RequestException as e:
-        return None, None, str(e)
+        return None, None, str(e), {}
 
-def parse_content(html, base_url):
-    start = time.perf_counter()
+# === HTML Parsers ===
+
+# Each backend returns (text, links, images); parse_content adds the timing.
+PARSER_BACKENDS = OrderedDict()
+PARSER_CONFIG = {"backend": None}  # None picks the fastest installed backend
+SKIPPED_TAGS = ("script", "style")
+
+
+def register_parser(name, available=True):
+    def decorator(func):
+        if available:
+            PARSER_BACKENDS[name] = func
+        return func
+    return decorator
+
+
+class StreamExtractor(HTMLParser):
+    # Collects text, links and images straight from parser events, without building a tree.
+    def __init__(self, base_url):
+        super().__init__(convert_charrefs=True)
+        self.base_url = base_url
+        self.text_parts = []
+        self.links = []
+        self.images = []
+        self._skip_depth = 0
+        self._anchor = None  # (href, text parts) of the <a> currently open
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIPPED_TAGS:
+            self._skip_depth += 1
+        elif tag == "a":
+            href = dict(attrs).get("href")
+            if href is not None:
+                self._close_anchor()
+                self._anchor = (href, [])
+        elif tag == "img":
+            src = dict(attrs).get("src")
+            if src is not None:
+                self.images.append(urljoin(self.base_url, src))
+
+    def handle_endtag(self, tag):
+        if tag in SKIPPED_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+        elif tag == "a":
+            self._close_anchor()
+
+    def handle_data(self, data):
+        if self._skip_depth:
+            return
+        stripped = data.strip()
+        if stripped:
+            self.text_parts.append(stripped)
+            if self._anchor:
+                self._anchor[1].append(stripped)
+
+    def _close_anchor(self):
+        if self._anchor:
+            href, parts = self._anchor
+            self.links.append(("".join(parts), urljoin(self.base_url, href)))
+            self._anchor = None
+
+    def result(self):
+        self.close()
+        self._close_anchor()
+        return " ".join(self.text_parts), self.links, self.images
+
+
+@register_parser("selectolax", available=SelectolaxParser is not None)
+def _parse_selectolax(html, base_url):
+    tree = SelectolaxParser(html)
+    tree.strip_tags(list(SKIPPED_TAGS))
+    root = tree.root
+    text = root.text(separator=" ", strip=True) if root else ""
+    links = [(a.text(strip=True), urljoin(base_url, a.attributes["href"] or ""))
+             for a in tree.css("a[href]")]
+    images = [urljoin(base_url, img.attributes["src"] or "") for img in tree.css("img[src]")]
+    return text, links, images
+
+
+@register_parser("lxml", available=lxml is not None)
+def _parse_lxml(html, base_url):
+    if not html.strip():
+        return "", [], []
+    root = lxml.html.document_fromstring(html.encode("utf-8"),
+                                         parser=lxml.html.HTMLParser(encoding="utf-8"))
+    for element in list(root.iter(*SKIPPED_TAGS)):
+        element.drop_tree()
+    text = " ".join(part.strip() for part in root.itertext() if part.strip())
+    links = [("".join(part.strip() for part in a.itertext()), urljoin(base_url, a.get("href")))
+             for a in root.iter("a") if a.get("href") is not None]
+    images = [urljoin(base_url, img.get("src")) for img in root.iter("img") if img.get("src") is not None]
+    return text, links, images
+
+
+@register_parser("stream")
+def _parse_stream(html, base_url):
+    extractor = StreamExtractor(base_url)
+    extractor.feed(html)
+    return extractor.result()
+
+
+@register_parser("bs4")
+def _parse_bs4(html, base_url):
     soup = BeautifulSoup(html, 'html.parser')
-    for tag in soup(['script', 'style']):
+    for tag in soup(list(SKIPPED_TAGS)):
         tag.decompose()
     text = soup.get_text(separator=' ', strip=True)
     links = [(a.get_text(strip=True), urljoin(base_url, a['href'])) for a in soup.find_all('a', href=True)]
     images = [urljoin(base_url, img['src']) for img in soup.find_all('img', src=True)]
+    return text, links, images
+
+
+def default_parser():
+    return PARSER_CONFIG["backend"] or next(iter(PARSER_BACKENDS))
+
+
+def parse_content(html, base_url, backend=None):
+    start = time.perf_counter()
+    text, links, images = PARSER_BACKENDS[backend or default_parser()](html, base_url)
     parse_duration = time.perf_counter() - start
     return text, links, images, parse_duration
 
+
+def load_corpus(corpus_dir):
+    pages = []
+    for root, _, files in os.walk(corpus_dir):
+        for name in sorted(files):
+            if name.endswith((".html", ".htm", ".body")):
+                with open(os.path.join(root, name), "r", encoding="utf-8", errors="replace") as f:
+                    pages.append(f.read())
+    return pages
+
+
+def benchmark_parsers(corpus_dir=None, repeat=3, backends=None):
+    # The HTTP cache doubles as a corpus of saved pages when no directory is given.
+    pages = load_corpus(corpus_dir or CACHE_CONFIG["directory"])
+    results = OrderedDict()
+    if not pages:
+        return results
+    base_url = "http://example.com/"
+    for name in backends or PARSER_BACKENDS:
+        per_page = [min(parse_content(html, base_url, backend=name)[3] for _ in range(repeat)) for html in pages]
+        total = sum(per_page)
+        results[name] = {
+            "pages": len(pages),
+            "total_time": total,
+            "mean_ms": total / len(pages) * 1000,
+            "max_ms": max(per_page) * 1000,
+            "pages_per_sec": len(pages) / total if total else float("inf"),
+        }
+    return results
+
+
+def format_parser_benchmark(results):
+    lines = [f"{'Backend':<12}{'Pages':>7}{'Total (s)':>12}{'Mean (ms)':>12}{'Max (ms)':>11}{'Pages/s':>11}"]
+    for name, r in results.items():
+        lines.append(f"{name:<12}{r['pages']:>7}{r['total_time']:>12.3f}{r['mean_ms']:>12.2f}"
+                     f"{r['max_ms']:>11.2f}{r['pages_per_sec']:>11.1f}")
+    return "\n".join(lines)
+
+# === Analysis & Reporting ===
+
+WORD_PATTERN = re.compile(r'\b\w+\b')
+
+
+class SpaceSaving:
+    # Approximate top-K term counts in fixed space; each count overestimates by at most errors[term].
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.counts = {}
+        self.errors = {}
+
+    def add(self, item, count=1):
+        if item in self.counts:
+            self.counts[item] += count
+        elif len(self.counts) < self.capacity:
+            self.counts[item] = count
+            self.errors[item] = 0
+        else:
+            victim = min(self.counts, key=self.counts.get)
+            floor = self.counts.pop(victim)
+            del self.errors[victim]
+            self.counts[item] = floor + count
+            self.errors[item] = floor
+
+    def top(self, k):
+        return sorted(self.counts.items(), key=lambda item: -item[1])[:k]
+
+
+class HyperLogLog:
+    # Distinct-count estimate in 2**precision bytes (~0.8% standard error at precision 14).
+    def __init__(self, precision=14):
+        self.precision = precision
+        self.size = 1 << precision
+        self.registers = bytearray(self.size)
+        self.alpha = 0.7213 / (1 + 1.079 / self.size)
+
+    def add(self, item):
+        value = int.from_bytes(hashlib.blake2b(item.encode("utf-8"), digest_size=8).digest(), "big")
+        index = value >> (64 - self.precision)
+        remainder = value & ((1 << (64 - self.precision)) - 1)
+        rank = (64 - self.precision) - remainder.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def count(self):
+        estimate = self.alpha * self.size * self.size / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * self.size and zeros:
+            estimate = self.size * math.log(self.size / zeros)  # linear counting for small sets
+        return int(round(estimate))
+
+
+class TextAnalytics:
+    # Running word count, top terms and unique link/image estimates in constant memory,
+    # so one instance can summarise a whole crawl.
+    def __init__(self, top_k=10, chunk_size=64 * 1024):
+        self.top_k = top_k
+        self.chunk_size = chunk_size
+        self.word_count = 0
+        self.terms = SpaceSaving(top_k * 20)
+        self.links = HyperLogLog()
+        self.images = HyperLogLog()
+
+    def feed_text(self, text):
+        page_terms = Counter()
+        carry = ""
+        for start in range(0, len(text), self.chunk_size):
+            chunk = carry + text[start:start + self.chunk_size]
+            # Hold back a word cut by the chunk boundary until the next chunk completes it.
+            cut = len(chunk)
+            if start + self.chunk_size < len(text):
+                while cut and (chunk[cut - 1].isalnum() or chunk[cut - 1] == "_"):
+                    cut -= 1
+            carry = chunk[cut:]
+            words = self._scan(chunk[:cut], page_terms)
+            self.word_count += words
+        for term, count in page_terms.items():
+            self.terms.add(term, count)
+
+    def _scan(self, chunk, page_terms):
+        words = 0
+        for match in WORD_PATTERN.finditer(chunk):
+            words += 1
+            term = match.group().lower()
+            if len(term) > 2 and not term.isdigit():
+                page_terms[term] += 1
+        return words
+
+    def add_page(self, text, links, images):
+        self.feed_text(text)
+        for _, href in links:
+            self.links.add(href)
+        for image in images:
+            self.images.add(image)
+
+    def metrics(self):
+        return {
+            "word_count": self.word_count,
+            "unique_links": self.links.count(),
+            "unique_images": self.images.count(),
+            "top_terms": self.terms.top(self.top_k),
+        }
+
+
 def analyze_performance(text, links, images):
-    words = re.findall(r'\b\w+\b', text)
-    return {
-        "word_count": len(words),
-        "unique_links": len(set(href for _, href in links)),
-        "unique_images": len(set(images))
-    }
+    analytics = TextAnalytics()
+    analytics.add_page(text, links, images)
+    return analytics.metrics()
 
-def generate_report(url, timestamp, timings, metrics, text, links, images, error=None):
+def output_folder(url):
     domain = urlparse(url).netloc.replace('.', '_')
-    folder_path = os.path.join("scraped_data", domain)
+    folder_path = os.path.join(OUTPUT_CONFIG["root"], domain)
     os.makedirs(folder_path, exist_ok=True)
+    return domain, folder_path
+
+def generate_report(url, timestamp, timings, metrics, text, links, images, error=None, write_data=True):
+    domain, folder_path = output_folder(url)
 
     report_filename = os.path.join(folder_path, f"{domain}_report.md")
     with open(report_filename, 'w', encoding='utf-8') as f:
@@ -58,12 +638,47 @@ def generate_report(url, timestamp, timings, metrics, text, links, images, error
         f.write(f"**Timestamp:** {timestamp}\n\n")
         f.write(f"## Performance Metrics\n")
         f.write(f"- Total scraping time: {timings['total_time']:.3f} seconds\n")
-        f.write(f"- HTTP request time: {timings['request_time']:.3f} seconds\n")
-        f.write(f"- HTML parsing time: {timings['parse_time']:.3f} seconds\n\n")
+        cache_label = CACHE_STATUS_LABELS.get(timings.get("cache_status"))
+        f.write(f"- HTTP request time: {timings['request_time']:.3f} seconds"
+                f"{f' ({cache_label})' if cache_label else ''}\n")
+        parser_label = f" ({timings['parser']})" if "parser" in timings else ""
+        f.write(f"- HTML parsing time: {timings['parse_time']:.3f} seconds{parser_label}\n")
+        if "connections_opened" in timings:
+            f.write(f"- Connections opened: {timings['connections_opened']}, "
+                    f"reused (keep-alive): {timings['connections_reused']} "
+                    f"over {timings['requests']} session requests\n")
+        f.write("\n")
+        if "pipeline" in timings:
+            pipeline = timings["pipeline"]
+            f.write(f"## Pipeline Throughput\n")
+            f.write(f"- Fetch stage: {pipeline['pages_fetched']} pages, {pipeline['fetched_per_sec']:.2f} pages/s "
+                    f"({pipeline['fetch_workers']} workers, {pipeline['fetch_errors']} errors)\n")
+            f.write(f"- Parse stage: {pipeline['pages_parsed']} pages, {pipeline['parsed_per_sec']:.2f} pages/s "
+                    f"({pipeline['parse_workers']} processes)\n")
+            f.write("- HTTP cache: " + ", ".join(f"{pipeline['cache'][status]} {label}"
+                                                  for status, label in CACHE_STATUS_LABELS.items()) + "\n")
+            f.write(f"- Politeness: {pipeline['hosts']} host(s), {pipeline['robots_fetched']} robots.txt fetched, "
+                    f"{pipeline['robots_blocked']} URLs disallowed\n")
+            f.write(f"- Near-duplicates skipped: {pipeline['duplicates']} of {pipeline['pages_parsed']} parsed pages "
+                    f"({pipeline['dedup_ratio'] * 100:.1f}%), fingerprinting {pipeline['fingerprint_time']:.3f} seconds\n")
+            f.write(f"- Frontier depth: avg {pipeline['frontier_depth_avg']:.1f}, max {pipeline['frontier_depth_max']}\n")
+            f.write(f"- Parse queue depth: avg {pipeline['parse_queue_depth_avg']:.1f}, "
+                    f"max {pipeline['parse_queue_depth_max']}\n")
+            if pipeline.get("state"):
+                state = pipeline["state"]
+                f.write(f"- Resumed: {state['resumed_done']} pages already done, "
+                        f"{state['resumed_queued']} still queued\n")
+                f.write(f"- Checkpoints: {state['checkpoints']} ({state['rows_written']} rows), "
+                        f"{state['checkpoint_time'] * 1000:.1f} ms total, max {state['checkpoint_max'] * 1000:.1f} ms, "
+                        f"{state['overhead'] * 100:.2f}% of crawl time\n")
+            f.write("\n")
         f.write(f"## Content Summary\n")
         f.write(f"- Word count: {metrics['word_count']}\n")
         f.write(f"- Unique links found: {metrics['unique_links']}\n")
-        f.write(f"- Unique image URLs found: {metrics['unique_images']}\n\n")
+        f.write(f"- Unique image URLs found: {metrics['unique_images']}\n")
+        if metrics.get("top_terms"):
+            f.write(f"- Top terms: {', '.join(f'{term} ({count})' for term, count in metrics['top_terms'])}\n")
+        f.write("\n")
         if error:
             f.write(f"## Errors\n- {error}\n")
         else:
@@ -75,6 +690,16 @@ def generate_report(url, timestamp, timings, metrics, text, links, images, error
             f.write(f"\n### First 10 Image URLs\n")
             for img in images[:10]:
                 f.write(f"- {img}\n")
+        if "output" in timings:
+            output = timings["output"]
+            f.write(f"\n## Crawl Output\n")
+            f.write(f"- Pages stored: {output['records']} in {output['segments']} segment(s), "
+                    f"{output['bytes'] / 1024:.1f} KiB {output['compression'] or 'uncompressed'}\n")
+            f.write(f"- Manifest: {output['manifest']}\n")
+
+    # Crawls stream their page data through CrawlWriter instead.
+    if not write_data:
+        return report_filename
 
     with open(os.path.join(folder_path, "text.txt"), 'w', encoding='utf-8') as f:
         f.write(text)
@@ -90,71 +715,1144 @@ def generate_report(url, timestamp, timings, metrics, text, links, images, error
 
     return report_filename
 
-# === GUI Function ===
+# === Near-Duplicate Detection ===
 
-def run_scraper():
-    url = url_entry.get().strip()
-    if not validate_url(url):
-        messagebox.showerror("Invalid URL", "Please enter a valid URL starting with http:// or https://")
-        return
+DEDUP_CONFIG = {
+    "enabled": True,
+    "max_distance": 3,  # Hamming distance between SimHashes that counts as a near-duplicate
+    "shingle_size": 3,  # words per shingle
+    "min_shingles": 20,  # shorter pages are too small to fingerprint reliably
+}
 
-    results_box.delete("1.0", tk.END)
+
+# Bit-slicing table: byte -> its 8 bits spread into 32-bit lanes, so one big-int addition
+# updates all 64 per-bit counters of a shingle hash at once.
+_LANE_BITS = 32
+_LANE_MASK = (1 << _LANE_BITS) - 1
+_SPREAD = [sum(1 << (bit * _LANE_BITS) for bit in range(8) if byte >> bit & 1) for byte in range(256)]
+
+
+def simhash(text, shingle_size=3, min_shingles=20):
+    window = deque(maxlen=shingle_size)
+    shingles = Counter()
+    for match in WORD_PATTERN.finditer(text.lower()):
+        window.append(match.group())
+        if len(window) == shingle_size:
+            shingles[" ".join(window)] += 1
+    if len(shingles) < min_shingles:
+        return None
+    lanes = 0
+    total = 0
+    for shingle, count in shingles.items():
+        value = int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "big")
+        spread = 0
+        for byte in range(8):
+            spread |= _SPREAD[value >> (8 * byte) & 0xFF] << (8 * byte * _LANE_BITS)
+        lanes += spread * count
+        total += count
+    # A bit is set when shingles with that bit set outweigh those without it.
+    return sum(1 << bit for bit in range(64) if 2 * (lanes >> (bit * _LANE_BITS) & _LANE_MASK) > total)
+
+
+def parse_page(html, base_url, backend=None, fingerprint=True):
+    # Runs in the parse pool so fingerprinting shares the CPU-bound stage with parsing.
+    text, links, images, parse_time = parse_content(html, base_url, backend)
+    start = time.perf_counter()
+    signature = simhash(text, DEDUP_CONFIG["shingle_size"], DEDUP_CONFIG["min_shingles"]) if fingerprint else None
+    return text, links, images, parse_time, signature, time.perf_counter() - start
+
+
+class SimHashIndex:
+    # LSH over SimHashes: with max_distance + 1 bands, any two hashes within max_distance bits
+    # agree exactly on at least one band, so only same-band candidates need a Hamming check.
+    def __init__(self, max_distance=3):
+        self.max_distance = max_distance
+        self.bands = max_distance + 1
+        self.band_bits = 64 // self.bands
+        self.buckets = {}
+
+    def _keys(self, signature):
+        mask = (1 << self.band_bits) - 1
+        return [(band, signature >> (band * self.band_bits) & mask) for band in range(self.bands)]
+
+    def find(self, signature):
+        for key in self._keys(signature):
+            for other, url in self.buckets.get(key, ()):
+                if bin(signature ^ other).count("1") <= self.max_distance:
+                    return url
+        return None
+
+    def add(self, signature, url):
+        for key in self._keys(signature):
+            self.buckets.setdefault(key, []).append((signature, url))
+
+# === Crawl State ===
+
+STATE_CONFIG = {
+    "checkpoint_interval": 5.0,  # seconds between checkpoints, stretched if they get expensive
+    "max_overhead": 0.05,        # fraction of crawl time checkpoints may take
+}
+
+
+class CrawlState:
+    # SQLite record of every scheduled URL and its status. Changes are buffered in memory and
+    # flushed in one transaction per checkpoint, so a crash loses at most one interval; pages
+    # still "queued" after a crash are simply fetched again on restart.
+    def __init__(self, path, checkpoint_interval=None, max_overhead=None):
+        self.path = path
+        self.checkpoint_interval = checkpoint_interval or STATE_CONFIG["checkpoint_interval"]
+        self.max_overhead = max_overhead or STATE_CONFIG["max_overhead"]
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("""CREATE TABLE IF NOT EXISTS urls (
+            url_key TEXT PRIMARY KEY,
+            url TEXT NOT NULL,
+            status TEXT NOT NULL,
+            error TEXT,
+            fingerprint TEXT,
+            updated_at REAL NOT NULL)""")
+        try:
+            self.conn.execute("ALTER TABLE urls ADD COLUMN fingerprint TEXT")
+        except sqlite3.OperationalError:
+            pass  # column already present
+        self.conn.execute("CREATE INDEX IF NOT EXISTS urls_status ON urls (status)")
+        self.conn.commit()
+        self._dirty = {}
+        self._started = time.perf_counter()
+        self._last_checkpoint = self._started
+        self.stats = {"checkpoints": 0, "checkpoint_time": 0.0, "checkpoint_max": 0.0,
+                      "rows_written": 0, "resumed_done": 0, "resumed_queued": 0}
+
+    def load(self):
+        seen, frontier, fingerprints = set(), [], []
+        for url_key, url, status, fingerprint in self.conn.execute(
+                "SELECT url_key, url, status, fingerprint FROM urls"):
+            seen.add(url_key)
+            if status == "queued":
+                frontier.append(url)
+            elif fingerprint and status == "done":
+                fingerprints.append((int(fingerprint, 16), url))
+        self.stats["resumed_queued"] = len(frontier)
+        self.stats["resumed_done"] = len(seen) - len(frontier)
+        return seen, frontier, fingerprints
+
+    def reset(self):
+        self.conn.execute("DELETE FROM urls")
+        self.conn.commit()
+        self._dirty.clear()
+
+    def mark(self, url_key, url, status, error=None, fingerprint=None):
+        fingerprint = f"{fingerprint:016x}" if fingerprint is not None else None
+        self._dirty[url_key] = (url_key, url, status, error, fingerprint, time.time())
+
+    def maybe_checkpoint(self):
+        if self._dirty and time.perf_counter() - self._last_checkpoint >= self.checkpoint_interval:
+            self.checkpoint()
+
+    def checkpoint(self):
+        if not self._dirty:
+            return
+        start = time.perf_counter()
+        rows = list(self._dirty.values())
+        self.conn.executemany("""INSERT INTO urls (url_key, url, status, error, fingerprint, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT(url_key) DO UPDATE SET status=excluded.status, error=excluded.error,
+            fingerprint=excluded.fingerprint, updated_at=excluded.updated_at""", rows)
+        self.conn.commit()
+        self._dirty.clear()
+        duration = time.perf_counter() - start
+        self._last_checkpoint = time.perf_counter()
+        self.stats["checkpoints"] += 1
+        self.stats["checkpoint_time"] += duration
+        self.stats["checkpoint_max"] = max(self.stats["checkpoint_max"], duration)
+        self.stats["rows_written"] += len(rows)
+        # Keep checkpointing under its overhead budget by spacing checkpoints out.
+        self.checkpoint_interval = max(self.checkpoint_interval, duration / self.max_overhead)
+
+    def summary(self):
+        elapsed = time.perf_counter() - self._started
+        return dict(self.stats, path=self.path, checkpoint_interval=self.checkpoint_interval,
+                    overhead=self.stats["checkpoint_time"] / elapsed if elapsed else 0.0)
+
+    def close(self):
+        self.checkpoint()
+        self.conn.close()
+
+# === Politeness ===
+
+POLITENESS_CONFIG = {
+    "respect_robots": True,
+    "robots_ttl": 3600,      # seconds a host's robots.txt stays cached
+    "requests_per_second": 2.0,  # per host; a robots.txt Crawl-delay lowers it further
+    "burst": 2,
+    "user_agent": "Mozilla/5.0",
+}
+
+
+class RobotsCache:
+    def __init__(self, ttl=None, user_agent=None):
+        self.ttl = ttl or POLITENESS_CONFIG["robots_ttl"]
+        self.user_agent = user_agent or POLITENESS_CONFIG["user_agent"]
+        self._entries = {}  # "scheme://host" -> (RobotFileParser, fetched_at)
+        self._locks = {}
+        self._lock = threading.Lock()
+        self.fetched = 0
+
+    def _parser(self, url):
+        parts = urlsplit(url)
+        origin = f"{parts.scheme}://{parts.netloc}"
+        with self._lock:
+            entry = self._entries.get(origin)
+            if entry and time.monotonic() - entry[1] < self.ttl:
+                return entry[0]
+            host_lock = self._locks.setdefault(origin, threading.Lock())
+        # One fetch per host at a time; other hosts keep going.
+        with host_lock:
+            with self._lock:
+                entry = self._entries.get(origin)
+                if entry and time.monotonic() - entry[1] < self.ttl:
+                    return entry[0]
+            parser = RobotFileParser(f"{origin}/robots.txt")
+            try:
+                response = get_session().get(parser.url, timeout=SESSION_CONFIG["timeout"])
+                if response.status_code in (401, 403):
+                    parser.disallow_all = True
+                elif response.status_code >= 400:
+                    parser.allow_all = True
+                else:
+                    parser.parse(response.text.splitlines())
+            except requests.RequestException:
+                parser.allow_all = True
+            with self._lock:
+                self._entries[origin] = (parser, time.monotonic())
+                self.fetched += 1
+            return parser
+
+    def allowed(self, url):
+        return self._parser(url).can_fetch(self.user_agent, url)
+
+    def crawl_delay(self, url):
+        return self._parser(url).crawl_delay(self.user_agent)
+
+
+class TokenBucket:
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def ready_at(self, now):
+        self._refill(now)
+        return now if self.tokens >= 1 else now + (1 - self.tokens) / self.rate
+
+    def consume(self, now):
+        self._refill(now)
+        self.tokens -= 1
+
+
+class HostScheduler:
+    # Frontier with one FIFO per host and a heap of (next allowed time, host), so workers always
+    # take whichever host is ready first and no host exceeds its token-bucket rate.
+    def __init__(self, requests_per_second=None, burst=None):
+        self.rate = requests_per_second or POLITENESS_CONFIG["requests_per_second"]
+        self.burst = burst or POLITENESS_CONFIG["burst"]
+        self._queues = {}
+        self._buckets = {}
+        self._heap = []
+        self._in_heap = set()
+        self._size = 0
+        self._ready = threading.Condition()
+
+    def _push_host(self, host, now):
+        heapq.heappush(self._heap, (self._buckets[host].ready_at(now), host))
+        self._in_heap.add(host)
+
+    def put(self, url):
+        host = urlsplit(url).netloc
+        with self._ready:
+            self._queues.setdefault(host, deque()).append(url)
+            self._buckets.setdefault(host, TokenBucket(self.rate, self.burst))
+            self._size += 1
+            if host not in self._in_heap:
+                self._push_host(host, time.monotonic())
+            self._ready.notify()
+
+    def get(self, timeout=None):
+        deadline = time.monotonic() + (timeout or 0)
+        with self._ready:
+            while True:
+                now = time.monotonic()
+                if self._heap and self._heap[0][0] <= now:
+                    _, host = heapq.heappop(self._heap)
+                    self._in_heap.discard(host)
+                    urls = self._queues[host]
+                    url = urls.popleft()
+                    self._size -= 1
+                    self._buckets[host].consume(now)
+                    if urls:
+                        self._push_host(host, now)
+                    return url
+                if now >= deadline:
+                    return None
+                wait = deadline - now
+                if self._heap:
+                    wait = min(wait, self._heap[0][0] - now)
+                self._ready.wait(wait)
+
+    def set_delay(self, host, delay):
+        # Crawl-delay: at most one request every `delay` seconds, no bursts. Called right after a
+        # request to the host was handed out, so the next one waits a full delay.
+        with self._ready:
+            bucket = self._buckets.setdefault(host, TokenBucket(self.rate, self.burst))
+            if not delay or 1 / delay >= bucket.rate:
+                return
+            bucket.rate = 1 / delay
+            bucket.capacity = 1
+            bucket.tokens = min(bucket.tokens, 0)
+            if host in self._in_heap:
+                self._heap = [entry for entry in self._heap if entry[1] != host]
+                heapq.heapify(self._heap)
+                self._push_host(host, time.monotonic())
+
+    def qsize(self):
+        return self._size
+
+    def host_count(self):
+        return len(self._queues)
+
+# === Crawl Pipeline ===
+
+CRAWL_CONFIG = {
+    "max_pages": 50,
+    "fetch_workers": 8,
+    "parse_workers": os.cpu_count() or 2,
+    "queue_size": 32,  # fetched pages allowed to wait for a parser before fetchers block
+    "same_host": True,
+}
+
+
+class Crawler:
+    # Fetch threads (I/O bound) feed a bounded queue that a dispatcher drains into a
+    # process pool (CPU bound); the coordinating thread expands links from parsed pages.
+    def __init__(self, start_urls, on_page=None, state=None, progress=None, cancel_event=None, **options):
+        self.options = dict(CRAWL_CONFIG, **options)
+        self.start_urls = list(start_urls)
+        self.on_page = on_page
+        self.state = state
+        self.progress = progress  # called as progress(kind, data) from the coordinating thread
+        self.hosts = {urlparse(url).netloc for url in self.start_urls}
+        self.frontier = HostScheduler()
+        self.robots = RobotsCache() if POLITENESS_CONFIG["respect_robots"] else None
+        self.parse_queue = queue.Queue(maxsize=self.options["queue_size"])
+        self.results = queue.Queue()
+        self.parse_slots = threading.BoundedSemaphore(self.options["parse_workers"] * 2)
+        self.cancel_event = cancel_event or threading.Event()
+        self.seen = set()
+        self.pending = 0
+        self.dedup = SimHashIndex(DEDUP_CONFIG["max_distance"]) if DEDUP_CONFIG["enabled"] else None
+        self.stats_lock = threading.Lock()
+        self.stats = {
+            "pages_fetched": 0, "pages_parsed": 0, "fetch_errors": 0,
+            "fetch_time": 0.0, "parse_time": 0.0, "duplicates": 0, "fingerprint_time": 0.0, "robots_blocked": 0,
+            "in_flight": 0, "bytes_received": 0, "cache_hit": 0, "cache_revalidated": 0, "cache_miss": 0,
+            "queue_samples": 0, "frontier_depth_max": 0, "parse_queue_depth_max": 0,
+            "frontier_depth_sum": 0, "parse_queue_depth_sum": 0,
+        }
+
+    def schedule(self, url):
+        url = url.split("#", 1)[0]
+        if not validate_url(url) or len(self.seen) >= self.options["max_pages"]:
+            return False
+        if self.options["same_host"] and urlparse(url).netloc not in self.hosts:
+            return False
+        key = normalize_url(url)
+        if key in self.seen:
+            return False
+        self.seen.add(key)
+        self.pending += 1
+        self.frontier.put(url)
+        if self.state:
+            self.state.mark(key, url, "queued")
+        return True
+
+    def _resume(self):
+        seen, frontier, fingerprints = self.state.load()
+        self.seen.update(seen)
+        if self.dedup:
+            for signature, url in fingerprints:
+                self.dedup.add(signature, url)
+        for url in frontier:
+            self.pending += 1
+            self.frontier.put(url)
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def _fetch_worker(self):
+        while not self.cancel_event.is_set():
+            url = self.frontier.get(timeout=0.1)
+            if url is None:
+                continue
+            if self.robots:
+                if not self.robots.allowed(url):
+                    with self.stats_lock:
+                        self.stats["robots_blocked"] += 1
+                    self.results.put({"url": url, "error": "Disallowed by robots.txt", "request_time": 0.0,
+                                      "parse_time": 0.0, "fetch_info": {}, "text": "", "links": [], "images": []})
+                    continue
+                self.frontier.set_delay(urlsplit(url).netloc, self.robots.crawl_delay(url))
+            with self.stats_lock:
+                self.stats["in_flight"] += 1
+            html, request_time, error, fetch_info = fetch_url_content(url)
+            with self.stats_lock:
+                self.stats["in_flight"] -= 1
+                self.stats["bytes_received"] += fetch_info.get("bytes", 0)
+            if error:
+                self.results.put({"url": url, "error": error, "request_time": 0.0, "parse_time": 0.0,
+                                  "fetch_info": fetch_info, "text": "", "links": [], "images": []})
+                continue
+            with self.stats_lock:
+                self.stats["pages_fetched"] += 1
+                self.stats["fetch_time"] += request_time
+                self.stats["cache_" + fetch_info["cache"]] += 1
+            page = {"url": url, "error": None, "request_time": request_time, "fetch_info": fetch_info}
+            while not self.cancel_event.is_set():
+                try:
+                    self.parse_queue.put((page, html), timeout=0.1)
+                    break
+                except queue.Full:
+                    continue
+
+    def _parse_dispatcher(self, executor, backend):
+        while not self.cancel_event.is_set():
+            try:
+                page, html = self.parse_queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            self.parse_slots.acquire()
+            future = executor.submit(parse_page, html, page["url"], backend, self.dedup is not None)
+            future.add_done_callback(lambda f, page=page: self._parsed(page, f))
+
+    def _parsed(self, page, future):
+        self.parse_slots.release()
+        try:
+            (page["text"], page["links"], page["images"], page["parse_time"],
+             page["fingerprint"], page["fingerprint_time"]) = future.result()
+        except Exception as e:
+            page.update(error=f"Parse failed: {e}", text="", links=[], images=[], parse_time=0.0)
+        self.results.put(page)
+
+    def _sample_queues(self):
+        stats = self.stats
+        frontier_depth, parse_depth = self.frontier.qsize(), self.parse_queue.qsize()
+        stats["queue_samples"] += 1
+        stats["frontier_depth_sum"] += frontier_depth
+        stats["parse_queue_depth_sum"] += parse_depth
+        stats["frontier_depth_max"] = max(stats["frontier_depth_max"], frontier_depth)
+        stats["parse_queue_depth_max"] = max(stats["parse_queue_depth_max"], parse_depth)
+
+    def _check_duplicate(self, page):
+        signature = page.get("fingerprint")
+        if self.dedup is None or signature is None:
+            return None
+        self.stats["fingerprint_time"] += page["fingerprint_time"]
+        original = self.dedup.find(signature)
+        if original is None:
+            self.dedup.add(signature, page["url"])
+        return original
+
+    def _handle(self, page):
+        self.pending -= 1
+        status = "failed"
+        if page["error"]:
+            self.stats["fetch_errors"] += 1
+        else:
+            self.stats["pages_parsed"] += 1
+            self.stats["parse_time"] += page["parse_time"]
+            page["duplicate_of"] = self._check_duplicate(page)
+            if page["duplicate_of"]:
+                # Near-duplicates add nothing new: don't follow their links or store them.
+                self.stats["duplicates"] += 1
+                status = "duplicate"
+            else:
+                status = "done"
+                for _, href in page["links"]:
+                    self.schedule(href)
+        if self.state:
+            self.state.mark(normalize_url(page["url"]), page["url"], status, page["error"],
+                            page.get("fingerprint") if status == "done" else None)
+        if self.on_page:
+            self.on_page(page)
+        if self.progress:
+            self.progress("page", {"url": page["url"], "error": page["error"], "request_time": page["request_time"],
+                                   "parse_time": page["parse_time"], "duplicate": bool(page.get("duplicate_of"))})
+
+    def snapshot(self):
+        with self.stats_lock:
+            return {"in_flight": self.stats["in_flight"], "bytes_received": self.stats["bytes_received"],
+                    "queued": self.frontier.qsize(), "parse_queue": self.parse_queue.qsize()}
+
+    def run(self):
+        start = time.perf_counter()
+        if self.state:
+            self._resume()
+        for url in self.start_urls:
+            self.schedule(url)
+        backend = default_parser()
+        # spawn keeps worker start-up safe while the fetch threads hold locks
+        with ProcessPoolExecutor(self.options["parse_workers"],
+                                 mp_context=multiprocessing.get_context("spawn")) as executor:
+            threads = [threading.Thread(target=self._fetch_worker, daemon=True)
+                       for _ in range(self.options["fetch_workers"])]
+            threads.append(threading.Thread(target=self._parse_dispatcher, args=(executor, backend), daemon=True))
+            for thread in threads:
+                thread.start()
+            last_status = 0.0
+            while self.pending and not self.cancel_event.is_set():
+                self._sample_queues()
+                if self.state:
+                    self.state.maybe_checkpoint()
+                if self.progress and time.monotonic() - last_status >= 0.25:
+                    self.progress("status", self.snapshot())
+                    last_status = time.monotonic()
+                try:
+                    self._handle(self.results.get(timeout=0.1))
+                except queue.Empty:
+                    continue
+            cancelled = bool(self.pending)
+            self.cancel_event.set()
+            for thread in threads:
+                thread.join()
+        self.cancelled = cancelled
+        if self.state:
+            self.state.checkpoint()
+        return self.throughput(time.perf_counter() - start)
+
+    def throughput(self, elapsed):
+        stats = self.stats
+        samples = max(1, stats["queue_samples"])
+        return {
+            "elapsed": elapsed,
+            "cancelled": getattr(self, "cancelled", False),
+            "bytes_received": stats["bytes_received"],
+            "pages_fetched": stats["pages_fetched"],
+            "pages_parsed": stats["pages_parsed"],
+            "fetch_errors": stats["fetch_errors"],
+            "fetched_per_sec": stats["pages_fetched"] / elapsed if elapsed else 0.0,
+            "parsed_per_sec": stats["pages_parsed"] / elapsed if elapsed else 0.0,
+            "fetch_time": stats["fetch_time"],
+            "parse_time": stats["parse_time"],
+            "cache": {status: stats["cache_" + status] for status in CACHE_STATUS_LABELS},
+            "duplicates": stats["duplicates"],
+            "dedup_ratio": stats["duplicates"] / stats["pages_parsed"] if stats["pages_parsed"] else 0.0,
+            "fingerprint_time": stats["fingerprint_time"],
+            "hosts": self.frontier.host_count(),
+            "robots_blocked": stats["robots_blocked"],
+            "robots_fetched": self.robots.fetched if self.robots else 0,
+            "frontier_depth_avg": stats["frontier_depth_sum"] / samples,
+            "frontier_depth_max": stats["frontier_depth_max"],
+            "parse_queue_depth_avg": stats["parse_queue_depth_sum"] / samples,
+            "parse_queue_depth_max": stats["parse_queue_depth_max"],
+            "fetch_workers": self.options["fetch_workers"],
+            "parse_workers": self.options["parse_workers"],
+            "state": self.state.summary() if self.state else None,
+        }
+
+# === Crawl Output ===
+
+OUTPUT_CONFIG = {
+    "root": "scraped_data",
+    "compression": "zstd" if zstandard else "gzip",  # "gzip", "zstd" or None
+    "segment_bytes": 64 * 1024 * 1024,
+}
+
+SEGMENT_SUFFIXES = {"gzip": ".ndjson.gz", "zstd": ".ndjson.zst", None: ".ndjson"}
+
+
+def _compress(data, compression):
+    if compression == "gzip":
+        return gzip.compress(data)
+    if compression == "zstd":
+        return zstandard.ZstdCompressor().compress(data)
+    return data
+
+
+def _decompress(data, compression):
+    if compression == "gzip":
+        return gzip.decompress(data)
+    if compression == "zstd":
+        return zstandard.ZstdDecompressor().decompress(data)
+    return data
+
+
+class CrawlWriter:
+    # Appends one NDJSON record per page to rolling segment files. Every record is its own
+    # gzip/zstd frame, so segments stay valid streams and manifest.ndjson can point at
+    # (segment, offset, length) for random access. Re-opening the folder resumes after the last record.
+    def __init__(self, folder, compression=None, segment_bytes=None):
+        self.folder = folder
+        self.compression = compression if compression is not None else OUTPUT_CONFIG["compression"]
+        if self.compression == "zstd" and zstandard is None:
+            self.compression = "gzip"
+        self.segment_bytes = segment_bytes or OUTPUT_CONFIG["segment_bytes"]
+        self.manifest_path = os.path.join(folder, "manifest.ndjson")
+        self.completed = set()
+        self.segment_index = 0
+        self.records = 0
+        self.bytes_written = 0
+        self._segment = None
+        self._lock = threading.Lock()
+        os.makedirs(folder, exist_ok=True)
+        self._load_manifest()
+        self._manifest = open(self.manifest_path, "a", encoding="utf-8")
+
+    def _load_manifest(self):
+        if not os.path.exists(self.manifest_path):
+            return
+        with open(self.manifest_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # torn final line from an interrupted run
+                self.completed.add(entry["url"])
+                self.segment_index = max(self.segment_index, entry["segment"])
+
+    def _segment_path(self, index, compression=None):
+        suffix = SEGMENT_SUFFIXES[compression or self.compression]
+        return os.path.join(self.folder, f"pages-{index:05d}{suffix}")
+
+    def _open_segment(self):
+        path = self._segment_path(self.segment_index)
+        if os.path.exists(path) and os.path.getsize(path) >= self.segment_bytes:
+            self.segment_index += 1
+            path = self._segment_path(self.segment_index)
+        self._segment = open(path, "ab")
+
+    def write(self, page):
+        if page["url"] in self.completed:
+            return False
+        record = {
+            "url": page["url"],
+            "scraped_at": datetime.datetime.now().isoformat(timespec="seconds"),
+            "error": page.get("error"),
+            "request_time": page.get("request_time"),
+            "parse_time": page.get("parse_time"),
+            "text": page.get("text", ""),
+            "links": page.get("links", []),
+            "images": page.get("images", []),
+        }
+        frame = _compress((json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8"), self.compression)
+        with self._lock:
+            if self._segment is None or self._segment.tell() >= self.segment_bytes:
+                if self._segment:
+                    self._segment.close()
+                    self.segment_index += 1
+                self._open_segment()
+            offset = self._segment.tell()
+            self._segment.write(frame)
+            self._segment.flush()
+            entry = {"url": page["url"], "segment": self.segment_index, "offset": offset,
+                     "length": len(frame), "compression": self.compression, "error": bool(page.get("error"))}
+            self._manifest.write(json.dumps(entry) + "\n")
+            self._manifest.flush()
+            self.completed.add(page["url"])
+            self.records += 1
+            self.bytes_written += len(frame)
+        return True
+
+    def reset(self):
+        # Drops the manifest and every segment, for a crawl that starts over instead of resuming.
+        with self._lock:
+            if self._segment:
+                self._segment.close()
+                self._segment = None
+            self._manifest.close()
+            for name in os.listdir(self.folder):
+                if name.startswith("pages-") and name.endswith(tuple(SEGMENT_SUFFIXES.values())):
+                    os.remove(os.path.join(self.folder, name))
+            self.completed.clear()
+            self.segment_index = 0
+            self.records = 0
+            self.bytes_written = 0
+            self._manifest = open(self.manifest_path, "w", encoding="utf-8")
+
+    def read(self, entry):
+        with open(self._segment_path(entry["segment"], entry["compression"]), "rb") as f:
+            f.seek(entry["offset"])
+            return json.loads(_decompress(f.read(entry["length"]), entry["compression"]))
+
+    def summary(self):
+        return {"records": self.records, "segments": self.segment_index + 1 if self.records else 0,
+                "bytes": self.bytes_written, "compression": self.compression, "manifest": self.manifest_path}
+
+    def close(self):
+        with self._lock:
+            if self._segment:
+                self._segment.close()
+                self._segment = None
+            self._manifest.close()
+
+# === Scrape Runs ===
+
+def run_crawl(url, max_pages, resume=True, progress=None, cancel_event=None, **options):
+    _, folder_path = output_folder(url)
+    writer = CrawlWriter(folder_path)
+    state = CrawlState(os.path.join(folder_path, "crawl_state.db"))
+    if not resume:
+        state.reset()
+        writer.reset()
+    # Only fixed-size analytics and report samples stay in memory; page data goes straight to disk.
+    totals = {"pages": 0, "first_error": None}
+    analytics = TextAnalytics()
+    sample = {"text": "", "links": [], "images": []}
+
+    def on_page(page):
+        if page.get("duplicate_of"):
+            return
+        writer.write(page)
+        if page["error"]:
+            totals["first_error"] = totals["first_error"] or page["error"]
+            return
+        totals["pages"] += 1
+        analytics.add_page(page["text"], page["links"], page["images"])
+        if not sample["text"]:
+            sample["text"] = page["text"][:500]
+        sample["links"].extend(page["links"][:10 - len(sample["links"])])
+        sample["images"].extend(page["images"][:10 - len(sample["images"])])
+
+    try:
+        pipeline = Crawler([url], on_page=on_page, state=state, progress=progress, cancel_event=cancel_event,
+                           max_pages=max_pages, **options).run()
+    finally:
+        writer.close()
+        state.close()
+    metrics = analytics.metrics()
+    timings = {"total_time": pipeline["elapsed"], "request_time": pipeline["fetch_time"],
+               "parse_time": pipeline["parse_time"], "pipeline": pipeline, "output": writer.summary()}
+    timings.update(session_stats())
+    timings["parser"] = default_parser()
+    scraped = totals["pages"]
+    timestamp = datetime.datetime.now()
+    # Resuming a crawl that had already finished: nothing left to fetch, and the earlier report stays.
+    if (pipeline["state"]["resumed_done"] and not pipeline["cancelled"]
+            and not pipeline["pages_parsed"] and not pipeline["fetch_errors"]):
+        return (
+            f"✅ Crawl Already Complete\n\n"
+            f"Start URL: {url}\n"
+            f"Timestamp: {timestamp}\n\n"
+            f"Pages: {pipeline['state']['resumed_done']} done in earlier runs, none left to fetch\n"
+            f"Untick \"Resume previous crawl\" (or pass --no-resume) to crawl it again.\n\n"
+            f"📁 Earlier results are in folder: {folder_path}"
+        )
+    error = None if scraped else (totals["first_error"] or "No pages could be fetched")
+    report_path = generate_report(url, timestamp, timings, metrics, sample["text"], sample["links"],
+                                  sample["images"], error, write_data=False)
+
+    headline = "⏹ Crawl Cancelled" if pipeline["cancelled"] else "✅ Crawl Complete!" if scraped else "❌ Crawl Failed"
+    return (
+        f"{headline}\n\n"
+        f"Start URL: {url}\n"
+        f"Timestamp: {timestamp}\n\n"
+        f"Pages: {pipeline['pages_parsed']} parsed, {pipeline['fetch_errors']} failed, "
+        f"{pipeline['duplicates']} near-duplicates skipped, "
+        f"{pipeline['state']['resumed_done']} done in earlier runs\n"
+        f"Total Time: {timings['total_time']:.2f}s\n"
+        f"Fetch Rate: {pipeline['fetched_per_sec']:.2f} pages/s\n"
+        f"Parse Rate: {pipeline['parsed_per_sec']:.2f} pages/s\n"
+        f"Max Queue Depth: {pipeline['parse_queue_depth_max']} awaiting parse\n\n"
+        f"Words: {metrics['word_count']}\n"
+        f"Links Found: {metrics['unique_links']}\n"
+        f"Images Found: {metrics['unique_images']}\n\n"
+        f"📁 All data saved to folder: {os.path.dirname(report_path)}"
+    )
+
+
+def scrape_page(url, progress=None, cancel_event=None):
     start_time = time.perf_counter()
-    html, request_time, fetch_error = fetch_url_content(url)
+    if progress:
+        progress("status", {"in_flight": 1, "bytes_received": 0, "queued": 0, "parse_queue": 0})
+    html, request_time, fetch_error, fetch_info = fetch_url_content(url)
+    if progress:
+        progress("status", {"in_flight": 0, "bytes_received": fetch_info.get("bytes", 0), "queued": 0, "parse_queue": 0})
+    # The fetch itself can't be interrupted, so a cancel during it takes effect before parsing and saving.
+    if cancel_event and cancel_event.is_set():
+        return f"⏹ Scrape Cancelled\n\nScraped URL: {url}\nNothing was saved."
 
     if fetch_error:
+        if progress:
+            progress("page", {"url": url, "error": fetch_error, "request_time": 0.0, "parse_time": 0.0,
+                              "duplicate": False})
         timings = {"total_time": 0, "request_time": 0, "parse_time": 0}
         metrics = {"word_count": 0, "unique_links": 0, "unique_images": 0}
         report_path = generate_report(url, datetime.datetime.now(), timings, metrics, "", [], [], fetch_error)
-        results_box.insert(tk.END, f"❌ Error: {fetch_error}\n\n📄 Report saved to: {report_path}")
-        return
+        return f"❌ Error: {fetch_error}\n\n📄 Report saved to: {report_path}"
 
     text, links, images, parse_time = parse_content(html, url)
+    if progress:
+        progress("page", {"url": url, "error": None, "request_time": request_time, "parse_time": parse_time,
+                          "duplicate": False})
     total_time = time.perf_counter() - start_time
     metrics = analyze_performance(text, links, images)
     timings = {"total_time": total_time, "request_time": request_time, "parse_time": parse_time}
+    timings.update(session_stats())
+    timings["cache_status"] = fetch_info.get("cache")
+    timings["parser"] = default_parser()
     timestamp = datetime.datetime.now()
     report_path = generate_report(url, timestamp, timings, metrics, text, links, images)
 
-    summary = (
+    connection = {True: "reused", False: "new", None: "not needed"}[fetch_info.get("connection_reused")]
+    return (
         f"✅ Scraping Complete!\n\n"
         f"Scraped URL: {url}\n"
         f"Timestamp: {timestamp}\n\n"
         f"Total Time: {timings['total_time']:.2f}s\n"
-        f"Request Time: {timings['request_time']:.2f}s\n"
-        f"Parsing Time: {timings['parse_time']:.2f}s\n\n"
+        f"Request Time: {timings['request_time']:.2f}s ({CACHE_STATUS_LABELS[timings['cache_status']]})\n"
+        f"Parsing Time: {timings['parse_time']:.2f}s\n"
+        f"Connection: {connection} "
+        f"({timings['connections_reused']}/{timings['requests']} reused this session)\n\n"
         f"Words: {metrics['word_count']}\n"
         f"Links Found: {metrics['unique_links']}\n"
         f"Images Found: {metrics['unique_images']}\n\n"
         f"📁 All data saved to folder: {os.path.dirname(report_path)}"
     )
 
+# === Background Jobs ===
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class ScrapeProgress:
+    # Folds job events into dashboard figures; lives on the Tk thread, latencies keep a bounded window.
+    def __init__(self, window=1000):
+        self.pages = 0
+        self.errors = 0
+        self.duplicates = 0
+        self.in_flight = 0
+        self.queued = 0
+        self.bytes_received = 0
+        self.request_times = deque(maxlen=window)
+        self.parse_times = deque(maxlen=window)
+
+    def apply(self, kind, data):
+        if kind == "status":
+            self.in_flight = data["in_flight"]
+            self.queued = data["queued"]
+            self.bytes_received = data["bytes_received"]
+        elif kind == "page":
+            if data["error"]:
+                self.errors += 1
+                return
+            self.pages += 1
+            self.duplicates += data["duplicate"]
+            self.request_times.append(data["request_time"])
+            self.parse_times.append(data["parse_time"])
+
+    def text(self):
+        return (
+            f"Pages: {self.pages}   In flight: {self.in_flight}   Queued: {self.queued}   "
+            f"Received: {self.bytes_received / 1024:.1f} KiB   Errors: {self.errors}   "
+            f"Duplicates: {self.duplicates}\n"
+            f"Request p50/p95: {percentile(self.request_times, 0.5) * 1000:.0f} / "
+            f"{percentile(self.request_times, 0.95) * 1000:.0f} ms   "
+            f"Parse p50/p95: {percentile(self.parse_times, 0.5) * 1000:.1f} / "
+            f"{percentile(self.parse_times, 0.95) * 1000:.1f} ms"
+        )
+
+
+class ScrapeJob:
+    # Runs a scrape or crawl off the Tk thread; everything it reports goes through `events`.
+    def __init__(self, url, max_pages, resume):
+        self.url = url
+        self.max_pages = max_pages
+        self.resume = resume
+        self.events = queue.Queue()
+        self.cancel_event = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def _progress(self, kind, data):
+        self.events.put((kind, data))
+
+    def _run(self):
+        try:
+            if self.max_pages > 1:
+                summary = run_crawl(self.url, self.max_pages, self.resume, self._progress, self.cancel_event)
+            else:
+                summary = scrape_page(self.url, self._progress, self.cancel_event)
+            self.events.put(("done", summary))
+        except Exception as e:
+            self.events.put(("done", f"❌ Error: {e}"))
+
+# === Benchmark Suite ===
+
+BENCH_WORDS = ("lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor incididunt ut "
+               "labore et dolore magna aliqua enim ad minim veniam quis nostrud exercitation ullamco").split()
+
+
+def generate_corpus(folder, pages=200, words_per_page=1500, links_per_page=10, seed=7):
+    rng = random.Random(seed)
+    for index in range(pages):
+        body = " ".join(rng.choice(BENCH_WORDS) for _ in range(words_per_page))
+        links = "".join(f'<li><a href="/page{rng.randrange(pages)}.html">Page link {n}</a></li>'
+                        for n in range(links_per_page))
+        with open(os.path.join(folder, f"page{index}.html"), "w", encoding="utf-8") as f:
+            f.write(f"<html><head><title>Page {index}</title><style>p {{margin: 0}}</style></head><body>"
+                    f"<h1>Page {index}</h1><p>{index} {body}</p><ul>{links}</ul>"
+                    f'<img src="/img/{index}.png"><script>var page = {index};</script></body></html>')
+
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like a real server
+    disable_nagle_algorithm = True  # headers and body go out in separate writes; don't let them wait on ACKs
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_folder(folder):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), functools.partial(_QuietHandler, directory=folder))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def peak_rss_mb():
+    if resource is None:
+        return None, None
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024  # ru_maxrss is bytes on macOS, KiB elsewhere
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale / (1024 * 1024)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * scale / (1024 * 1024)
+    return own, children
+
+
+def benchmark_level(start_url, out, level, pages, parse_workers=None):
+    # One concurrency level of run_benchmark. It runs in a fresh process, so the peak RSS
+    # (a lifetime maximum) belongs to this level alone rather than to every level so far.
+    CACHE_CONFIG["enabled"] = False
+    POLITENESS_CONFIG.update(requests_per_second=1e9, burst=1e9, respect_robots=False)
+    configure_session(pool_maxsize=max(SESSION_CONFIG["pool_maxsize"], level))
+    request_times, parse_times = [], []
+
+    def progress(kind, data):
+        if kind == "page" and not data["error"]:
+            request_times.append(data["request_time"])
+            parse_times.append(data["parse_time"])
+
+    writer = CrawlWriter(os.path.join(out, f"run-{level}"))
+    options = {"fetch_workers": level, "max_pages": pages}
+    if parse_workers:
+        options["parse_workers"] = parse_workers
+    pipeline = Crawler([start_url], on_page=writer.write, progress=progress, **options).run()
+    writer.close()
+    rss, children_rss = peak_rss_mb()
+    return {
+        "concurrency": level,
+        "pages": pipeline["pages_parsed"],
+        "errors": pipeline["fetch_errors"],
+        "elapsed": pipeline["elapsed"],
+        "pages_per_sec": pipeline["pages_parsed"] / pipeline["elapsed"] if pipeline["elapsed"] else 0.0,
+        "request_ms": {name: percentile(request_times, q) * 1000
+                       for name, q in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99), ("max", 1.0))},
+        "parse_ms": {name: percentile(parse_times, q) * 1000
+                     for name, q in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99), ("max", 1.0))},
+        "peak_rss_mb": rss,
+        "peak_child_rss_mb": children_rss,
+    }
+
+
+def run_benchmark(pages=200, concurrency_levels=(1, 4, 8), parse_workers=None):
+    # Crawls a generated corpus over loopback with caching and rate limits off, so the numbers
+    # measure the fetch/parse/store pipeline rather than the network or politeness delays.
+    results = []
+    with tempfile.TemporaryDirectory() as corpus, tempfile.TemporaryDirectory() as out:
+        generate_corpus(corpus, pages)
+        server = serve_folder(corpus)
+        start_url = f"http://127.0.0.1:{server.server_address[1]}/page0.html"
+        try:
+            for level in concurrency_levels:
+                with ProcessPoolExecutor(1, mp_context=multiprocessing.get_context("spawn")) as executor:
+                    results.append(executor.submit(benchmark_level, start_url, out, level, pages,
+                                                   parse_workers).result())
+        finally:
+            server.shutdown()
+            server.server_close()
+    return results
+
+
+def format_benchmark(results):
+    lines = [f"{'Workers':>7}{'Pages':>7}{'Pages/s':>9}{'Req p50':>9}{'Req p95':>9}{'Req p99':>9}"
+             f"{'Parse p50':>11}{'Parse p95':>11}{'RSS MB':>8}{'Child MB':>10}"]
+    for r in results:
+        rss = f"{r['peak_rss_mb']:.0f}" if r["peak_rss_mb"] is not None else "n/a"
+        child = f"{r['peak_child_rss_mb']:.0f}" if r["peak_child_rss_mb"] is not None else "n/a"
+        lines.append(f"{r['concurrency']:>7}{r['pages']:>7}{r['pages_per_sec']:>9.1f}"
+                     f"{r['request_ms']['p50']:>9.1f}{r['request_ms']['p95']:>9.1f}{r['request_ms']['p99']:>9.1f}"
+                     f"{r['parse_ms']['p50']:>11.2f}{r['parse_ms']['p95']:>11.2f}{rss:>8}{child:>10}")
+    return "\n".join(lines)
+
+# === Command Line ===
+
+def main(argv):
+    parser = argparse.ArgumentParser(prog="Web Scraper.py", description="Scrape or crawl pages without the GUI.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    scrape = commands.add_parser("scrape", help="scrape one or more URLs")
+    scrape.add_argument("urls", nargs="+", metavar="URL")
+    scrape.add_argument("--concurrency", type=int, default=CRAWL_CONFIG["fetch_workers"],
+                        help="concurrent fetches (default: %(default)s)")
+    scrape.add_argument("--out", default=OUTPUT_CONFIG["root"], help="output folder (default: %(default)s)")
+    scrape.add_argument("--max-pages", type=int, default=1, help="crawl up to this many pages per URL")
+    scrape.add_argument("--parser", choices=list(PARSER_BACKENDS), help="HTML parser backend")
+    scrape.add_argument("--no-resume", action="store_true", help="start crawls from scratch")
+
+    bench = commands.add_parser("bench", help="benchmark the crawl pipeline against a local generated corpus")
+    bench.add_argument("--pages", type=int, default=200)
+    bench.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8])
+    bench.add_argument("--parse-workers", type=int)
+    bench.add_argument("--json", help="also write the results to this JSON file")
+
+    bench_parsers = commands.add_parser("bench-parsers", help="compare parser backends on saved pages")
+    bench_parsers.add_argument("corpus", nargs="?", help="folder of .html pages (default: the HTTP cache)")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "bench":
+        results = run_benchmark(args.pages, args.concurrency, args.parse_workers)
+        print(format_benchmark(results))
+        if args.json:
+            with open(args.json, "w", encoding="utf-8") as f:
+                json.dump(results, f, indent=2)
+        return 0
+
+    if args.command == "bench-parsers":
+        bench_results = benchmark_parsers(args.corpus)
+        print(format_parser_benchmark(bench_results) if bench_results else "No saved pages found to benchmark.")
+        return 0
+
+    invalid = [url for url in args.urls if not validate_url(url)]
+    if invalid:
+        parser.error(f"URLs must start with http:// or https://: {', '.join(invalid)}")
+    OUTPUT_CONFIG["root"] = args.out
+    CACHE_CONFIG["directory"] = os.path.join(args.out, ".http_cache")
+    PARSER_CONFIG["backend"] = args.parser
+    configure_session(pool_maxsize=max(SESSION_CONFIG["pool_maxsize"], args.concurrency))
+    if args.max_pages > 1:
+        for url in args.urls:
+            print(run_crawl(url, args.max_pages, not args.no_resume, fetch_workers=args.concurrency), end="\n\n")
+    else:
+        with ThreadPoolExecutor(args.concurrency) as executor:
+            for summary in executor.map(scrape_page, args.urls):
+                print(summary, end="\n\n")
+    return 0
+
+# === GUI Function ===
+
+current_job = None
+job_progress = None
+
+
+def run_scraper():
+    global current_job, job_progress
+    url = url_entry.get().strip()
+    if not validate_url(url):
+        messagebox.showerror("Invalid URL", "Please enter a valid URL starting with http:// or https://")
+        return
+    if current_job:
+        return
+
+    results_box.delete("1.0", tk.END)
+    job_progress = ScrapeProgress()
+    dashboard_label.config(text=job_progress.text())
+    current_job = ScrapeJob(url, max_pages_var.get(), resume_var.get())
+    current_job.start()
+    scrape_button.config(state=tk.DISABLED)
+    cancel_button.config(state=tk.NORMAL)
+    app.after(100, poll_job)
+
+
+def cancel_scraper():
+    if current_job:
+        current_job.cancel()
+        cancel_button.config(state=tk.DISABLED)
+
+
+def poll_job():
+    global current_job
+    summary = None
+    for _ in range(500):  # drain in batches so a burst of events can't starve the UI
+        try:
+            kind, data = current_job.events.get_nowait()
+        except queue.Empty:
+            break
+        if kind == "done":
+            summary = data
+            break
+        job_progress.apply(kind, data)
+    dashboard_label.config(text=job_progress.text())
+    if summary is None:
+        app.after(100, poll_job)
+        return
     results_box.insert(tk.END, summary)
+    current_job = None
+    scrape_button.config(state=tk.NORMAL)
+    cancel_button.config(state=tk.DISABLED)
 
 # === GUI Layout ===
 
-app = tk.Tk()
-app.title("Web Scraper")
-app.geometry("720x520")
-app.resizable(False, False)
+# Guarded so the parse pool's workers and other scripts can import this module without opening a window.
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        sys.exit(main(sys.argv[1:]))
+
+    app = tk.Tk()
+    app.title("Web Scraper")
+    app.geometry("720x560")
+    app.resizable(False, False)
+
+    style = ttk.Style(app)
+    style.theme_use('clam')
+    style.configure("TButton", font=("Segoe UI", 10), padding=6)
+    style.configure("TLabel", font=("Segoe UI", 10))
+    style.configure("TEntry", font=("Segoe UI", 10))
+
+    frame = ttk.Frame(app, padding=20)
+    frame.pack(fill=tk.BOTH, expand=True)
 
-style = ttk.Style(app)
-style.theme_use('clam')
-style.configure("TButton", font=("Segoe UI", 10), padding=6)
-style.configure("TLabel", font=("Segoe UI", 10))
-style.configure("TEntry", font=("Segoe UI", 10))
+    ttk.Label(frame, text="Enter URL:").grid(row=0, column=0, sticky=tk.W)
+    url_entry = ttk.Entry(frame, width=80)
+    url_entry.grid(row=0, column=1, padx=10, pady=5)
 
-frame = ttk.Frame(app, padding=20)
-frame.pack(fill=tk.BOTH, expand=True)
+    scrape_button = ttk.Button(frame, text="Start Scraping", command=run_scraper)
+    scrape_button.grid(row=0, column=2, padx=5)
+    cancel_button = ttk.Button(frame, text="Cancel", command=cancel_scraper, state=tk.DISABLED)
+    cancel_button.grid(row=1, column=2, padx=5)
 
-ttk.Label(frame, text="Enter URL:").grid(row=0, column=0, sticky=tk.W)
-url_entry = ttk.Entry(frame, width=80)
-url_entry.grid(row=0, column=1, padx=10, pady=5)
+    ttk.Label(frame, text="Max pages:").grid(row=1, column=0, sticky=tk.W)
+    max_pages_var = tk.IntVar(value=1)
+    ttk.Spinbox(frame, from_=1, to=1000, textvariable=max_pages_var, width=8).grid(row=1, column=1, padx=10, sticky=tk.W)
+    resume_var = tk.BooleanVar(value=True)
+    ttk.Checkbutton(frame, text="Resume previous crawl", variable=resume_var).grid(row=1, column=1, padx=(100, 0), sticky=tk.W)
 
-scrape_button = ttk.Button(frame, text="Start Scraping", command=run_scraper)
-scrape_button.grid(row=0, column=2, padx=5)
+    dashboard_label = ttk.Label(frame, text="", font=("Consolas", 9))
+    dashboard_label.grid(row=2, column=0, columnspan=3, sticky=tk.W, pady=(10, 0))
 
-results_box = scrolledtext.ScrolledText(frame, height=22, wrap=tk.WORD, font=("Consolas", 10))
-results_box.grid(row=1, column=0, columnspan=3, pady=10)
+    results_box = scrolledtext.ScrolledText(frame, height=17, wrap=tk.WORD, font=("Consolas", 10))
+    results_box.grid(row=3, column=0, columnspan=3, pady=10)
 
-app.mainloop()
+    app.mainloop()
@@ -1,18 +1,51 @@
 # title: Activity Monitor
 
 import os
+import re
+import sys
+import gzip
 import json
+import shutil
+import queue
+import sqlite3
+import argparse
 import tkinter as tk
 from tkinter import ttk, messagebox
 import threading
 import time
-from datetime import datetime
-from collections import defaultdict
-import matplotlib.pyplot as plt
+from array import array
+from datetime import datetime, timedelta
+import math
+from matplotlib.figure import Figure
+from matplotlib.dates import AutoDateLocator, AutoDateFormatter, date2num
+from matplotlib.ticker import AutoLocator, ScalarFormatter
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 
 CONFIG_FILE = "monitor_config.json"
 LOG_FILE = "activity_logs.txt"
+STRUCTURED_LOG_FILE = "activity_logs.ndjson"  # same records as LOG_FILE, one JSON object per line
+LOG_ROTATE_BYTES = 5 * 1024 * 1024
+LOG_ROTATE_SECONDS = 24 * 60 * 60
+LOG_KEEP_SEGMENTS = 30  # rotated segments kept per log file
+LOG_INDEX_FILE = "activity_logs.db"  # queryable copy of the logs, rebuilt from them when missing
+LOG_INDEX_HEAD_BYTES = 256  # prefix remembered per file to tell an appended file from a rotated one
+LOG_INDEX_BATCH = 5000  # lines parsed and inserted per transaction while ingesting
+LOG_LINE = re.compile(r"\[(?:(\d{4}-\d\d-\d\d) )?(\d\d:\d\d:\d\d)\] "
+                      r"(?:([^:]+?) (checked OK)\.|([^:]+): ?(.*?))\s*$")
+LOG_RECORD_SEPARATOR = re.compile(r"(?:\\n)+(?=\[)")
+CHECK_CATEGORY = "Feature Check"  # old "[time] X checked OK." heartbeats, filed with X as the value
+WEEKDAYS = ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+HISTORY_MAX_POINTS = 300  # buckets plotted for a historical range
+HISTORY_BUCKET_WIDTHS = (60, 5 * 60, 15 * 60, 60 * 60, 6 * 60 * 60, 24 * 60 * 60, 7 * 24 * 60 * 60)
+
+# In-memory sample history for the live graph: a fixed ring, so memory stays the same however long
+# the monitor runs. Longer ranges are aggregated from the log index (LogIndex) instead.
+RAW_SAMPLE_CAPACITY = 720  # 1 hour at one sample per 5 seconds
+SAMPLE_INTERVAL = 5  # seconds between samples
+GRAPH_WINDOW = 120  # seconds shown on the Graph tab
+UI_POLL_MS = 200  # how often the Tk thread drains sampler events
+LOG_VIEW_MAX_LINES = 1000
+LOG_VIEW_TRIM_LINES = 200  # extra lines dropped at once when the cap is hit, so trimming is rare
 
 default_config = {
     "Application Usage": True,
@@ -22,9 +55,311 @@ default_config = {
     "Idle Buffer Timer": 1  # minutes
 }
 
-activity_logs = defaultdict(list)
-idle_times = []
-app_usage_times = []
+class RingBuffer:
+    # Fixed-capacity (timestamp, value) samples in two typed arrays; when full, the oldest is overwritten.
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.times = array("d", bytes(8 * capacity))
+        self.values = array("d", bytes(8 * capacity))
+        self.start = 0
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def append(self, timestamp, value):
+        index = (self.start + self.count) % self.capacity
+        self.times[index] = timestamp
+        self.values[index] = value
+        if self.count < self.capacity:
+            self.count += 1
+        else:
+            self.start = (self.start + 1) % self.capacity
+
+    def latest(self, n=None):
+        # Last n samples, oldest first, as (times, values) lists.
+        n = self.count if n is None else min(n, self.count)
+        indexes = [(self.start + self.count - n + i) % self.capacity for i in range(n)]
+        return [self.times[i] for i in indexes], [self.values[i] for i in indexes]
+
+
+def nice_ceiling(value):
+    # Smallest 1/2/5 x 10^n at or above value, so the y axis only rescales on real jumps.
+    if value <= 1:
+        return 1
+    magnitude = 10 ** math.floor(math.log10(value))
+    return next(step * magnitude for step in (1, 2, 5, 10) if step * magnitude >= value)
+
+
+class LogWriter:
+    # Owns the log files on its own thread. Callers only queue records; the thread buffers them and writes,
+    # flushes and fsyncs once per interval, so a crash loses at most one interval. Both files rotate by size
+    # or age, and rotated segments are optionally gzipped.
+    def __init__(self, path=LOG_FILE, structured_path=STRUCTURED_LOG_FILE, flush_interval=60,
+                 max_bytes=LOG_ROTATE_BYTES, max_age=LOG_ROTATE_SECONDS, compress=True, keep=LOG_KEEP_SEGMENTS,
+                 on_error=None):
+        self.paths = (path, structured_path)
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.compress = compress
+        self.keep = keep
+        self.on_error = on_error
+        self.records = queue.Queue()
+        self.files = {}
+        self.opened_at = {}
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def write(self, category, value, timestamp=None):
+        self.records.put((time.time() if timestamp is None else timestamp, category, value))
+
+    def close(self):
+        self.records.put(None)
+        self.thread.join()
+
+    def run(self):
+        text, structured = [], []
+        deadline = time.monotonic() + self.flush_interval
+        while True:
+            try:
+                record = self.records.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                record = False
+            if record:
+                timestamp, category, value = record
+                # Window titles can contain newlines; keep the text log one record per line.
+                line = str(value).replace("\r", " ").replace("\n", " ")
+                text.append(f"[{datetime.fromtimestamp(timestamp):%Y-%m-%d %H:%M:%S}] {category}: {line}\n")
+                structured.append(json.dumps({"ts": round(timestamp, 3), "category": category, "value": value},
+                                             ensure_ascii=False) + "\n")
+            if record is None or time.monotonic() >= deadline:
+                if text:
+                    self.flush("".join(text), "".join(structured))
+                    text, structured = [], []
+                deadline = time.monotonic() + self.flush_interval
+            if record is None:
+                break
+        for handle in self.files.values():
+            handle.close()
+        self.files.clear()
+
+    def flush(self, text, structured):
+        try:
+            for path, data in zip(self.paths, (text, structured)):
+                handle = self.open(path, len(data.encode("utf-8")))
+                handle.write(data)
+                handle.flush()
+                os.fsync(handle.fileno())
+        except Exception as e:
+            if self.on_error:
+                self.on_error(e)
+
+    def open(self, path, incoming):
+        handle = self.files.get(path)
+        if handle is None:
+            handle = self.files[path] = open(path, "a", encoding="utf-8")
+            # The age of an existing file counts from its last write, so restarts don't postpone rotation.
+            self.opened_at[path] = os.path.getmtime(path) if handle.tell() else time.time()
+        size = handle.tell()
+        if size and (size + incoming > self.max_bytes or self.period(self.opened_at[path]) != self.period(time.time())):
+            handle.close()
+            del self.files[path]
+            self.rotate(path)
+            return self.open(path, incoming)
+        return handle
+
+    def period(self, timestamp):
+        # Age rotation happens on local-time boundaries (midnight for the default of one day).
+        return (timestamp + time.localtime(timestamp).tm_gmtoff) // self.max_age
+
+    def rotate(self, path):
+        base, ext = os.path.splitext(path)
+        segment = f"{base}.{datetime.now():%Y%m%d-%H%M%S-%f}{ext}"
+        os.replace(path, segment)
+        if self.compress:
+            with open(segment, "rb") as source, gzip.open(segment + ".gz", "wb") as target:
+                shutil.copyfileobj(source, target)
+            os.remove(segment)
+        for old in rotated_segments(path)[:-self.keep or None]:
+            os.remove(old)
+
+
+def rotated_segments(path):
+    # Rotated copies of path (plain or gzipped), oldest first; the timestamped names sort chronologically.
+    folder = os.path.dirname(path)
+    base, ext = os.path.splitext(os.path.basename(path))
+    names = [name for name in os.listdir(folder or ".")
+             if name.startswith(base + ".") and (name.endswith(ext) or name.endswith(ext + ".gz"))
+             and name != os.path.basename(path)]
+    return [os.path.join(folder, name) for name in sorted(names)]
+
+
+def parse_log_lines(lines, date):
+    # (timestamp, category, value, amount) for every record in the text log, in any format it has been
+    # written in: "[date time] Category: value", the "=== Section ===" blocks of "[date time] X checked OK.",
+    # and older "[time] Category: value" lines, sometimes joined by literal "\n". Those have no date, so they
+    # take the date of the line before them (or `date`), rolling over at midnight.
+    last = None
+    for line in lines:
+        for part in LOG_RECORD_SEPARATOR.split(line.strip()):
+            match = LOG_LINE.match(part)
+            if not match:
+                continue
+            day, clock, checked, _, category, value = match.groups()
+            if checked:
+                # A heartbeat, not a sample of X, so it must not count towards X's time.
+                category, value = CHECK_CATEGORY, checked
+            moment = datetime.strptime(f"{day or date} {clock}", "%Y-%m-%d %H:%M:%S")
+            if not day and last is not None and moment < last - timedelta(hours=1):
+                moment += timedelta(days=1)
+            date = moment.strftime("%Y-%m-%d")
+            last = moment
+            try:
+                amount = float(value)
+            except ValueError:
+                amount = None
+            yield moment.timestamp(), category, value, amount
+
+
+class LogIndex:
+    # SQLite copy of the text logs, indexed by time and category, so reports and the Graph tab aggregate
+    # any range in SQL instead of rescanning every log file. Ingestion is incremental: each file's read
+    # offset is remembered, and duplicates (a segment that was already read as the live file) are ignored.
+    def __init__(self, path=LOG_INDEX_FILE):
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("""CREATE TABLE IF NOT EXISTS records (
+            ts REAL NOT NULL,
+            category TEXT NOT NULL,
+            value TEXT,
+            amount REAL,
+            UNIQUE (ts, category, value))""")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS records_category_ts ON records (category, ts)")
+        self.conn.execute("""CREATE TABLE IF NOT EXISTS sources (
+            path TEXT PRIMARY KEY,
+            read_offset INTEGER NOT NULL,
+            head BLOB NOT NULL)""")
+        self.conn.commit()
+
+    def ingest(self, paths=None):
+        # Reads everything new in the given files (default: the rotated segments and the live text log).
+        # Returns the number of records added.
+        if paths is None:
+            paths = rotated_segments(LOG_FILE) + [LOG_FILE]
+        return sum(self.ingest_file(path) for path in paths if os.path.exists(path))
+
+    def ingest_file(self, path):
+        compressed = path.endswith(".gz")
+        opener = gzip.open if compressed else open
+        with opener(path, "rb") as f:
+            head = f.read(LOG_INDEX_HEAD_BYTES)
+        with self.lock:
+            row = self.conn.execute("SELECT read_offset, head FROM sources WHERE path = ?", (path,)).fetchone()
+        offset = 0
+        # Same file as last time if it still starts the same way; otherwise it was rotated and replaced.
+        if row and row[1] and head.startswith(row[1]) and (compressed or os.path.getsize(path) >= row[0]):
+            if compressed:
+                return 0
+            offset = row[0]
+
+        added = 0
+        batch = []
+        date = datetime.fromtimestamp(os.path.getmtime(path)).strftime("%Y-%m-%d")
+        with opener(path, "rb") as f:
+            f.seek(offset)
+            for raw in f:
+                if not raw.endswith(b"\n") and not compressed:
+                    break  # still being written; picked up by the next ingest
+                offset += len(raw)
+                batch.append(raw.decode("utf-8", "replace"))
+                if len(batch) >= LOG_INDEX_BATCH:
+                    added += self.insert(batch, date)
+                    batch = []
+        added += self.insert(batch, date)
+        with self.lock:
+            self.conn.execute("INSERT OR REPLACE INTO sources VALUES (?, ?, ?)", (path, offset, head))
+            self.conn.commit()
+        return added
+
+    def insert(self, lines, date):
+        records = list(parse_log_lines(lines, date))
+        with self.lock:
+            before = self.conn.total_changes
+            self.conn.executemany("INSERT OR IGNORE INTO records VALUES (?, ?, ?, ?)", records)
+            self.conn.commit()
+            return self.conn.total_changes - before
+
+    def summary(self, start, end):
+        # {category: (samples, seconds, largest value)} for start <= ts < end. Each sample stands for
+        # SAMPLE_INTERVAL seconds of the state it records.
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT category, COUNT(*), MAX(amount) FROM records WHERE ts >= ? AND ts < ? GROUP BY category",
+                (start, end)).fetchall()
+        return {category: (count, count * SAMPLE_INTERVAL, largest) for category, count, largest in rows}
+
+    def top_values(self, category, start, end, limit=10):
+        # Most frequent values of a category (e.g. window titles), as (value, seconds).
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT value, COUNT(*) AS samples FROM records WHERE category = ? AND ts >= ? AND ts < ? "
+                "GROUP BY value ORDER BY samples DESC LIMIT ?", (category, start, end, limit)).fetchall()
+        return [(value, count * SAMPLE_INTERVAL) for value, count in rows]
+
+    def series(self, category, start, end, width):
+        # (bucket start, samples, largest value) per non-empty `width`-second bucket, oldest first.
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT CAST((ts - ?) / ? AS INTEGER) AS bucket, COUNT(*), MAX(amount) FROM records "
+                "WHERE category = ? AND ts >= ? AND ts < ? GROUP BY bucket ORDER BY bucket",
+                (start, width, category, start, end)).fetchall()
+        return [(start + bucket * width, count, largest) for bucket, count, largest in rows]
+
+
+def parse_moment(text, now=None):
+    # "today", "yesterday", a weekday name (its most recent past occurrence), "YYYY-MM-DD" or
+    # "YYYY-MM-DD HH:MM", as a local datetime.
+    text = text.strip().lower()
+    today = (now or datetime.now()).replace(hour=0, minute=0, second=0, microsecond=0)
+    if text == "today":
+        return today
+    if text == "yesterday":
+        return today - timedelta(days=1)
+    if text in WEEKDAYS:
+        return today - timedelta(days=(today.weekday() - WEEKDAYS.index(text)) % 7 or 7)
+    for fmt in ("%Y-%m-%d %H:%M", "%Y-%m-%d"):
+        try:
+            return datetime.strptime(text, fmt)
+        except ValueError:
+            pass
+    raise ValueError(f"Not a date: {text!r} (use YYYY-MM-DD [HH:MM], today, yesterday or a weekday)")
+
+
+def parse_range(start_text, end_text="", now=None):
+    # (start, end) epoch seconds; without an end the range covers the 24 hours from start.
+    start = parse_moment(start_text, now)
+    end = parse_moment(end_text, now) if end_text.strip() else start + timedelta(days=1)
+    if end <= start:
+        raise ValueError("The end of the range must be after its start.")
+    return start.timestamp(), end.timestamp()
+
+
+def bucket_width(span):
+    return next((width for width in HISTORY_BUCKET_WIDTHS if span / width <= HISTORY_MAX_POINTS),
+                HISTORY_BUCKET_WIDTHS[-1])
+
+
+def format_duration(seconds):
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h {minutes:02d}m" if hours else f"{minutes}m {seconds:02d}s"
+
+
+idle_times = RingBuffer(RAW_SAMPLE_CAPACITY)
+app_usage_times = RingBuffer(RAW_SAMPLE_CAPACITY)
 last_activity_time = time.time()
 start_time = time.time()
 
@@ -130,11 +465,18 @@ class MonitorApp:
         self.root.geometry("1100x700")
         self.config = load_config()
         self.monitoring = False
-        self.last_saved_time = time.time()
         self.start_buffer_time = time.time() + self.config.get("Idle Buffer Timer", 1) * 60
+        # Background threads never touch Tk; they post ("log", text), ("graph", None) or ("history", data) here.
+        self.events = queue.Queue()
+        self.log_index = LogIndex()
+        self.history = None  # (start, end) while the Graph tab shows a past range instead of the live window
+        self.log_writer = LogWriter(flush_interval=self.config.get("Log Save Interval", 1) * 60,
+                                    on_error=lambda e: self.post_log(f"[ERROR] Failed to save logs: {e} \n"))
 
         self.create_widgets()
         self.start_monitoring()
+        self.root.after(UI_POLL_MS, self.drain_events)
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
 
     def create_widgets(self):
         self.notebook = ttk.Notebook(self.root)
@@ -154,9 +496,51 @@ class MonitorApp:
         self.log_display = tk.Text(self.main_frame, height=25, font=("Courier New", 10))
         self.log_display.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
 
+        controls = ttk.Frame(self.graph_frame)
+        controls.pack(fill=tk.X, padx=10, pady=5)
+        ttk.Label(controls, text="From:").pack(side=tk.LEFT)
+        self.history_from = tk.StringVar(value="today")
+        ttk.Entry(controls, textvariable=self.history_from, width=18).pack(side=tk.LEFT, padx=5)
+        ttk.Label(controls, text="To:").pack(side=tk.LEFT)
+        self.history_to = tk.StringVar()
+        ttk.Entry(controls, textvariable=self.history_to, width=18).pack(side=tk.LEFT, padx=5)
+        ttk.Button(controls, text="Plot Range", command=self.plot_history).pack(side=tk.LEFT, padx=5)
+        ttk.Button(controls, text="Live", command=self.show_live).pack(side=tk.LEFT)
+        self.history_summary = ttk.Label(controls, text="")
+        self.history_summary.pack(side=tk.LEFT, padx=10)
+
         self.plot_area = ttk.Frame(self.graph_frame)
         self.plot_area.pack(fill=tk.BOTH, expand=True)
-        self.show_graph()
+        self.create_graph()
+        self.notebook.bind("<<NotebookTabChanged>>", lambda event: self.show_graph())
+
+    def create_graph(self):
+        # One figure for the app's lifetime. Lines are animated, so a full draw leaves them out and
+        # each tick only restores the saved background and blits the two lines over it.
+        self.figure = Figure(figsize=(10, 4))
+        self.ax = self.figure.add_subplot()
+        self.idle_line, = self.ax.plot([], [], marker='o', linestyle='-', label="Idle Time (sec)", color='red',
+                                       animated=True)
+        self.activity_line, = self.ax.plot([], [], marker='x', linestyle='--', label="Activity", color='green',
+                                           animated=True)
+        self.set_live_axes()
+
+        self.canvas = FigureCanvasTkAgg(self.figure, master=self.plot_area)
+        self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        self.background = None
+        self.canvas.mpl_connect("draw_event", self.on_graph_draw)
+
+    def set_live_axes(self):
+        self.ax.xaxis.set_major_locator(AutoLocator())
+        self.ax.xaxis.set_major_formatter(ScalarFormatter())
+        self.idle_line.set_label("Idle Time (sec)")
+        self.activity_line.set_label("Activity")
+        self.ax.set_title("User Activity and Idle Time (Last 2 Minutes)")
+        self.ax.set_xlabel("Seconds Ago")
+        self.ax.set_ylabel("Value")
+        self.ax.set_xlim(-GRAPH_WINDOW, 0)
+        self.ax.set_ylim(0, 1)
+        self.ax.legend(loc="upper left")
 
     def start_monitoring(self):
         self.monitoring = True
@@ -182,36 +566,52 @@ class MonitorApp:
                 if self.config.get("Application Usage", False):
                     active_app = self.get_active_window()
                     if active_app:
-                        activity_logs["Application Usage"].append((timestamp, active_app))
-                        app_usage_times.append((timestamp, 1))
-                        self.log_display.insert(tk.END, f"[{timestamp}] App: {active_app} \n")
+                        self.log_writer.write("Application Usage", active_app, now)
+                        app_usage_times.append(now, 1)
+                        self.post_log(f"[{timestamp}] App: {active_app} \n")
 
                 if self.config.get("Idle Time Detection", False) and now > self.start_buffer_time:
                     idle_time = now - last_activity_time
                     if idle_time >= idle_threshold:
-                        idle_times.append((timestamp, idle_time))
-                        self.log_display.insert(tk.END, f"[{timestamp}] Idle: {idle_time:.2f} sec \n")
-
-                if now - self.last_saved_time >= self.config.get("Log Save Interval", 1) * 60:
-                    self.save_logs()
-                    self.last_saved_time = now
-
-                self.log_display.see(tk.END)
-                self.show_graph()
-                time.sleep(5)
-        except Exception as e:
-            self.log_display.insert(tk.END, f"[ERROR] Monitoring failed: {e} \n")
+                        idle_times.append(now, idle_time)
+                        self.log_writer.write("Idle Time Detection", round(idle_time, 2), now)
+                        self.post_log(f"[{timestamp}] Idle: {idle_time:.2f} sec \n")
 
-    def save_logs(self):
-        try:
-            with open(LOG_FILE, "a") as log_file:
-                for key, entries in activity_logs.items():
-                    for entry in entries:
-                        log_file.write(f"[{entry[0]}] {key}: {entry[1]} \n")
-                log_file.write("\n")
-            activity_logs.clear()
+                self.events.put(("graph", None))
+                time.sleep(SAMPLE_INTERVAL)
         except Exception as e:
-            self.log_display.insert(tk.END, f"[ERROR] Failed to save logs: {e} \n")
+            self.post_log(f"[ERROR] Monitoring failed: {e} \n")
+
+    def post_log(self, text):
+        self.events.put(("log", text))
+
+    def drain_events(self):
+        # Applies everything queued since the last poll in one insert and at most one graph update.
+        lines = []
+        graph = False
+        for _ in range(1000):
+            try:
+                kind, data = self.events.get_nowait()
+            except queue.Empty:
+                break
+            if kind == "log":
+                lines.append(data)
+            elif kind == "history":
+                self.draw_history(data)
+            else:
+                graph = True
+        if lines:
+            self.append_log("".join(lines))
+        if graph:
+            self.show_graph()
+        self.root.after(UI_POLL_MS, self.drain_events)
+
+    def append_log(self, text):
+        self.log_display.insert(tk.END, text)
+        line_count = int(self.log_display.index("end-1c").split(".")[0])
+        if line_count > LOG_VIEW_MAX_LINES:
+            self.log_display.delete("1.0", f"{line_count - LOG_VIEW_MAX_LINES + LOG_VIEW_TRIM_LINES}.0")
+        self.log_display.see(tk.END)
 
     def get_active_window(self):
         try:
@@ -223,42 +623,148 @@ class MonitorApp:
     def apply_settings(self, new_config):
         self.config = new_config
         self.start_buffer_time = time.time() + self.config.get("Idle Buffer Timer", 1) * 60
-        self.log_display.insert(tk.END, "[INFO] Settings saved. \n")
-        self.log_display.see(tk.END)
+        self.log_writer.flush_interval = self.config.get("Log Save Interval", 1) * 60
+        self.append_log("[INFO] Settings saved. \n")
 
     def cancel_settings(self, original_config):
         self.config = original_config
-        self.log_display.insert(tk.END, "[INFO] Settings canceled.\n")
-        self.log_display.see(tk.END)
+        self.append_log("[INFO] Settings canceled.\n")
+
+    def on_close(self):
+        # Stop sampling and flush whatever the writer still buffers before the window goes away.
+        self.monitoring = False
+        self.log_writer.close()
+        self.root.destroy()
+
+    def on_graph_draw(self, event):
+        # Full redraws (first show, resize, y rescale) refresh the background used for blitting.
+        self.background = self.canvas.copy_from_bbox(self.figure.bbox)
+        self.ax.draw_artist(self.idle_line)
+        self.ax.draw_artist(self.activity_line)
 
     def show_graph(self):
-        for widget in self.plot_area.winfo_children():
-            widget.destroy()
+        if self.history is not None or self.notebook.select() != str(self.graph_frame):
+            return
+
+        now = time.time()
+        top = 1
+        for line, store in ((self.idle_line, idle_times), (self.activity_line, app_usage_times)):
+            times, values = store.latest(GRAPH_WINDOW // SAMPLE_INTERVAL + 2)
+            points = [(t - now, v) for t, v in zip(times, values) if now - t <= GRAPH_WINDOW]
+            line.set_data([p[0] for p in points], [p[1] for p in points])
+            top = max([top] + [p[1] for p in points])
+
+        top = nice_ceiling(top * 1.1)
+        if self.background is None or top != self.ax.get_ylim()[1]:
+            self.ax.set_ylim(0, top)
+            self.canvas.draw()
+            return
+        self.canvas.restore_region(self.background)
+        self.ax.draw_artist(self.idle_line)
+        self.ax.draw_artist(self.activity_line)
+        self.canvas.blit(self.ax.bbox)
 
-        fig, ax = plt.subplots(figsize=(10, 4))
 
-        if idle_times:
-            times_idle = [t[0] for t in idle_times[-20:]]
-            values_idle = [t[1] for t in idle_times[-20:]]
-            ax.plot(times_idle, values_idle, marker='o', linestyle='-', label="Idle Time (sec)", color='red')
+    def plot_history(self):
+        try:
+            start, end = parse_range(self.history_from.get(), self.history_to.get())
+        except ValueError as e:
+            messagebox.showerror("Invalid Range", str(e))
+            return
+        self.history = (start, end)
+        self.history_summary.config(text="Loading...")
+        threading.Thread(target=self.load_history, args=(start, end), daemon=True).start()
 
-        if app_usage_times:
-            times_app = [t[0] for t in app_usage_times[-20:]]
-            values_app = [t[1] for t in app_usage_times[-20:]]
-            ax.plot(times_app, values_app, marker='x', linestyle='--', label="Activity", color='green')
+    def load_history(self, start, end):
+        # Only per-bucket aggregates leave SQLite, so a year takes no more memory than an hour.
+        try:
+            self.log_index.ingest()
+            width = bucket_width(end - start)
+            result = {"start": start, "end": end, "width": width, "summary": self.log_index.summary(start, end),
+                      "idle": self.log_index.series("Idle Time Detection", start, end, width),
+                      "activity": self.log_index.series("Application Usage", start, end, width)}
+        except Exception as e:
+            self.post_log(f"[ERROR] Failed to load history: {e} \n")
+            return
+        self.events.put(("history", result))
+
+    def draw_history(self, result):
+        if self.history != (result["start"], result["end"]):
+            return  # superseded by another range or by going back to live
+        width = result["width"]
+        top = 1
+        for line, rows in ((self.idle_line, result["idle"]), (self.activity_line, result["activity"])):
+            minutes = [count * SAMPLE_INTERVAL / 60 for _, count, _ in rows]
+            line.set_data([date2num(datetime.fromtimestamp(start + width / 2)) for start, _, _ in rows], minutes)
+            top = max([top] + minutes)
+
+        locator = AutoDateLocator()
+        self.ax.xaxis.set_major_locator(locator)
+        self.ax.xaxis.set_major_formatter(AutoDateFormatter(locator))
+        self.idle_line.set_label("Idle")
+        self.activity_line.set_label("Active")
+        self.ax.set_title(f"Activity from {datetime.fromtimestamp(result['start']):%Y-%m-%d %H:%M} "
+                          f"to {datetime.fromtimestamp(result['end']):%Y-%m-%d %H:%M}")
+        self.ax.set_xlabel("Time")
+        self.ax.set_ylabel(f"Minutes per {format_duration(width)}")
+        self.ax.set_xlim(date2num(datetime.fromtimestamp(result["start"])),
+                         date2num(datetime.fromtimestamp(result["end"])))
+        self.ax.set_ylim(0, nice_ceiling(top * 1.1))
+        self.ax.legend(loc="upper left")
+        self.canvas.draw()
+
+        summary = result["summary"]
+        idle = summary.get("Idle Time Detection", (0, 0, None))[1]
+        active = summary.get("Application Usage", (0, 0, None))[1]
+        self.history_summary.config(text=f"Idle: {format_duration(idle)}   Active: {format_duration(active)}")
+
+    def show_live(self):
+        self.history = None
+        self.history_summary.config(text="")
+        self.set_live_axes()
+        self.background = None
+        self.show_graph()
 
-        ax.set_title("User Activity and Idle Time (Last 20 Samples)")
-        ax.set_xlabel("Time")
-        ax.set_ylabel("Value")
-        ax.legend()
-        ax.tick_params(axis='x', rotation=45)
 
-        canvas = FigureCanvasTkAgg(fig, master=self.plot_area)
-        canvas.draw()
-        canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+def report(start, end, index_path=LOG_INDEX_FILE, top=10, out=sys.stdout):
+    index = LogIndex(index_path)
+    index.ingest()
+    print(f"{datetime.fromtimestamp(start):%Y-%m-%d %H:%M} - {datetime.fromtimestamp(end):%Y-%m-%d %H:%M}", file=out)
+    summary = index.summary(start, end)
+    if not summary:
+        print("No activity recorded in this range.", file=out)
+        return
+    for category, (count, seconds, _) in sorted(summary.items()):
+        if category == CHECK_CATEGORY:
+            print(f"  {category}: {count} records", file=out)
+        else:
+            print(f"  {category}: {format_duration(seconds)} ({count} samples)", file=out)
+    for value, seconds in index.top_values("Application Usage", start, end, top):
+        print(f"    {format_duration(seconds):>9}  {value}", file=out)
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(prog="activity_monitor.py", description="Activity reports from the saved logs.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    report_parser = commands.add_parser("report", help="time idle/active and top applications over a range")
+    report_parser.add_argument("start", help="YYYY-MM-DD [HH:MM], today, yesterday or a weekday (its last occurrence)")
+    report_parser.add_argument("end", nargs="?", default="", help="same formats; default: 24 hours after start")
+    report_parser.add_argument("--top", type=int, default=10, help="applications listed (default: %(default)s)")
+    report_parser.add_argument("--index", default=LOG_INDEX_FILE, help="index database (default: %(default)s)")
+
+    args = parser.parse_args(argv)
+    try:
+        start, end = parse_range(args.start, args.end)
+    except ValueError as e:
+        parser.error(str(e))
+    report(start, end, args.index, args.top)
+    return 0
 
 
 if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        sys.exit(main(sys.argv[1:]))
     root = tk.Tk()
     app = MonitorApp(root)
     root.mainloop()
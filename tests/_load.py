@@ -0,0 +1,21 @@
+import os
+import sys
+import shutil
+import tempfile
+import importlib
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_folder = None
+
+
+def load_script(file_name, module_name):
+    # The scripts' file names aren't importable, and their process pools (spawn) import the module
+    # again by name, so each is copied under an importable name into one folder on sys.path.
+    global _folder
+    if module_name in sys.modules:
+        return sys.modules[module_name]
+    if _folder is None:
+        _folder = tempfile.mkdtemp()
+        sys.path.insert(0, _folder)
+    shutil.copy(os.path.join(ROOT, file_name), os.path.join(_folder, module_name + ".py"))
+    return importlib.import_module(module_name)
@@ -0,0 +1,181 @@
+import io
+import os
+import json
+import sqlite3
+import tempfile
+import threading
+import functools
+import importlib.util
+import unittest
+from http.server import ThreadingHTTPServer
+
+from . import _load
+
+
+def load_script():
+    return _load.load_script("Video Downloader.py", "video_downloader")
+
+
+@unittest.skipUnless(importlib.util.find_spec("yt_dlp"), "yt-dlp is not installed")
+class BatchTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.vd = load_script()
+        cls.payload = os.urandom(256 * 1024)
+        handler = functools.partial(cls.vd._RangeHandler, payload=cls.payload)
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        cls.server.daemon_threads = True
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base = f"http://127.0.0.1:{cls.server.server_address[1]}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.folder = os.path.join(self.tmp.name, "out")
+        os.makedirs(self.folder)
+        self.journal = os.path.join(self.tmp.name, "journal.db")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def stub_playlist(self, url):
+        # Stands in for yt-dlp: a "playlist" of three direct files with the same content.
+        return {'title': 'stub', 'entries': [{'title': f"clip {name}", 'url': f"{self.base}/{name}.mp4"}
+                                             for name in ("a", "b", "c")]}
+
+    def run_batch(self, urls):
+        out = io.StringIO()
+        options = {'flat_extractor': self.stub_playlist, 'extractor': self.stub_playlist,
+                   'cache': self.vd.FormatCache(os.path.join(self.tmp.name, "cache")), 'postprocess_workers': 1}
+        failed = self.vd.run_batch(urls, self.folder, 2, 2, self.vd.DEFAULT_FORMAT, self.journal, out=out,
+                                   engine_options=options)
+        events = [json.loads(line) for line in out.getvalue().splitlines()]
+        return failed, events
+
+    def stored_hashes(self):
+        with sqlite3.connect(self.journal) as conn:
+            return conn.execute("SELECT COUNT(*) FROM downloads WHERE content_hash IS NOT NULL").fetchone()[0]
+
+    def test_batch_downloads_playlist_and_skips_it_on_rerun(self):
+        failed, events = self.run_batch(["https://videos.test/playlist"])
+        self.assertEqual(failed, 0)
+        self.assertEqual(events[-1], {'event': 'summary', 'done': 3, 'failed': 0, 'cancelled': 0, 'paused': 0})
+        done = [e for e in events if e['event'] == 'state' and e['state'] == 'done']
+        self.assertEqual(len(done), 3)
+        for event in done:
+            with open(event['path'], "rb") as f:
+                self.assertEqual(f.read(), self.payload)
+        self.assertEqual(self.stored_hashes(), 3)
+
+        failed, events = self.run_batch(["https://videos.test/playlist"])
+        self.assertEqual(failed, 0)
+        done = [e for e in events if e['event'] == 'state' and e['state'] == 'done']
+        self.assertEqual([e['note'] for e in done], ['existing'] * 3)
+        self.assertFalse([e for e in events if e['event'] == 'state' and e['state'] == 'downloading'])
+        # Skipping must not overwrite the finished rows, or duplicate detection loses their hashes.
+        self.assertEqual(self.stored_hashes(), 3)
+
+    def test_empty_playlist_is_reported_not_downloaded(self):
+        self.stub_playlist = lambda url: {'title': 'empty', 'entries': []}
+        failed, events = self.run_batch(["https://videos.test/empty"])
+        self.assertEqual(failed, 1)
+        self.assertEqual(events[0], {'event': 'error', 'url': "https://videos.test/empty",
+                                     'error': "playlist has no entries"})
+        self.assertEqual(events[-1], {'event': 'summary', 'done': 0, 'failed': 0, 'cancelled': 0, 'paused': 0})
+
+    def test_batch_does_not_wait_for_paused_jobs(self):
+        journal = self.vd.DownloadJournal(self.journal)
+        item = self.vd.DownloadItem("paused-job", f"{self.base}/paused.mp4", ("paused", "direct", "", "N/A"), 0, 0)
+        item.state = 'paused'
+        journal.record(item)
+        journal.conn.close()
+
+        result = {}
+        runner = threading.Thread(target=lambda: result.update(zip(("failed", "events"), self.run_batch([]))),
+                                  daemon=True)
+        runner.start()
+        runner.join(timeout=10)
+        self.assertFalse(runner.is_alive(), "batch kept waiting for a paused job")
+        self.assertEqual(result['events'][-1]['paused'], 1)
+
+
+@unittest.skipUnless(importlib.util.find_spec("yt_dlp"), "yt-dlp is not installed")
+class FilterTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.vd = load_script()
+
+    def row(self, format_id, **fmt):
+        fmt['format_id'] = format_id
+        return self.vd.FormatRow(format_id, "https://videos.test/v", "Test video", fmt, (0, 0))
+
+    def matching(self, text, rows):
+        predicate = self.vd.compile_filter(text)
+        return [row.format_id for row in rows if predicate(row)]
+
+    def test_size_units(self):
+        rows = [self.row("small", filesize=50 * 1024), self.row("medium", filesize=300 * 1024 ** 2),
+                self.row("large", filesize=3 * 1024 ** 3)]
+        self.assertEqual(self.matching("size>100kb", rows), ["medium", "large"])
+        self.assertEqual(self.matching("size<100k", rows), ["small"])
+        self.assertEqual(self.matching("size>100", rows), ["medium", "large"])
+        self.assertEqual(self.matching("size>=300mb and size<1gb", rows), ["medium"])
+        self.assertEqual(self.matching("size>1.5g", rows), ["large"])
+        with self.assertRaises(ValueError):
+            self.vd.compile_filter("size>100tb")
+
+    def test_unknown_size_never_matches_a_size_comparison(self):
+        rows = [self.row("known", filesize=10 * 1024 ** 2), self.row("unknown")]
+        self.assertEqual(self.matching("size<500", rows), ["known"])
+        self.assertEqual(self.matching("size!=1", rows), ["known"])
+        self.assertEqual(self.matching("not size<500", rows), ["unknown"])
+
+    def test_stray_operators_are_rejected(self):
+        for text in ("and", "mp4 or", "or mp4", "mp4 and and webm", ">720", "mp4 and >= 5", ")", "mp4 )"):
+            with self.subTest(text=text), self.assertRaises(ValueError):
+                self.vd.compile_filter(text)
+
+    def test_words_and_comparisons(self):
+        rows = [self.row("137", ext="mp4", height=1080, vcodec="avc1.640028"),
+                self.row("248", ext="webm", height=1080, vcodec="vp9"),
+                self.row("18", ext="mp4", height=360, vcodec="avc1.42001E")]
+        self.assertEqual(self.matching("mp4 and height>=720", rows), ["137"])
+        self.assertEqual(self.matching("1080p and not avc1", rows), ["248"])
+        self.assertEqual(self.matching("height>=720p or format=18", rows), ["137", "248", "18"])
+
+
+class RangeDownloadTests(unittest.TestCase):
+    @unittest.skipUnless(importlib.util.find_spec("yt_dlp"), "yt-dlp is not installed")
+    def test_range_benchmark_reassembles_payload(self):
+        vd = load_script()
+        results = vd.run_range_benchmark(size_mb=1, chunk_counts=(1, 4))
+        self.assertEqual([r['chunks'] for r in results], [1, 4])
+        self.assertTrue(all(r['intact'] for r in results))
+
+    @unittest.skipUnless(importlib.util.find_spec("yt_dlp"), "yt-dlp is not installed")
+    def test_server_ignoring_ranges_falls_back_to_one_stream(self):
+        vd = load_script()
+        payload = os.urandom(vd.RANGE_MIN_SIZE + 1024)
+        handler = functools.partial(vd._RangeHandler, payload=payload, honor_ranges=False)
+        server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, "file.mp4")
+            segments = []
+            size = vd.download_ranged(f"http://127.0.0.1:{server.server_address[1]}/file.mp4", path,
+                                      connections=4, limiter=vd.BandwidthLimiter(0), segments=segments)
+            self.assertEqual(size, len(payload))
+            self.assertEqual(len(segments), 1)
+            with open(path, "rb") as f:
+                self.assertEqual(f.read(), payload)
+
+
+if __name__ == "__main__":
+    unittest.main()
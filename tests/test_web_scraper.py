@@ -0,0 +1,261 @@
+import io
+import os
+import re
+import time
+import tempfile
+import contextlib
+import threading
+import importlib.util
+import unittest
+
+from . import _load
+
+
+# The module imports requests and beautifulsoup4 at the top, so every test needs them.
+needs_dependencies = unittest.skipUnless(importlib.util.find_spec("requests") and importlib.util.find_spec("bs4"),
+                                         "requests and beautifulsoup4 are not installed")
+
+
+def load_script():
+    return _load.load_script("Web Scraper.py", "web_scraper")
+
+
+@needs_dependencies
+class ScraperTestCase(unittest.TestCase):
+    # Runs each test in its own working directory, since output, cache and crawl state are relative paths.
+    @classmethod
+    def setUpClass(cls):
+        cls.ws = load_script()
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cwd = os.getcwd()
+        os.chdir(self.tmp.name)
+        self.servers = []
+        # Local servers don't need protecting; tests that check rate limits pass their own rates.
+        self.politeness = dict(self.ws.POLITENESS_CONFIG)
+        self.ws.POLITENESS_CONFIG["requests_per_second"] = 1000
+        self.configs = [(config, dict(config)) for config in (self.ws.CACHE_CONFIG, self.ws.OUTPUT_CONFIG)]
+
+    def tearDown(self):
+        for server in self.servers:
+            server.shutdown()
+            server.server_close()
+        self.ws.POLITENESS_CONFIG.update(self.politeness)
+        for config, saved in self.configs:
+            config.update(saved)
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+
+    def serve(self, files=None, pages=0):
+        # A local site: `pages` generated corpus pages plus any extra {name: text} files.
+        folder = tempfile.mkdtemp(dir=self.tmp.name)
+        if pages:
+            self.ws.generate_corpus(folder, pages=pages, words_per_page=200, links_per_page=5)
+        for name, text in (files or {}).items():
+            with open(os.path.join(folder, name), "w", encoding="utf-8") as f:
+                f.write(text)
+        server = self.ws.serve_folder(folder)
+        self.servers.append(server)
+        return f"http://127.0.0.1:{server.server_address[1]}"
+
+
+class ResumeTests(ScraperTestCase):
+    def test_rerunning_a_finished_crawl_keeps_its_report(self):
+        base = self.serve(pages=15)
+        url = f"{base}/page0.html"
+        options = {"fetch_workers": 4, "parse_workers": 1}
+        first = self.ws.run_crawl(url, 25, **options)
+        self.assertTrue(first.startswith("✅ Crawl Complete!"), first)
+        _, folder = self.ws.output_folder(url)
+        report = next(name for name in os.listdir(folder) if name.endswith("_report.md"))
+        with open(os.path.join(folder, report), encoding="utf-8") as f:
+            before = f.read()
+
+        again = self.ws.run_crawl(url, 25, **options)
+        self.assertTrue(again.startswith("✅ Crawl Already Complete"), again)
+        with open(os.path.join(folder, report), encoding="utf-8") as f:
+            self.assertEqual(f.read(), before)
+
+    def test_crawl_without_resume_stores_every_page_again(self):
+        base = self.serve(pages=15)
+        url = f"{base}/page0.html"
+        options = {"fetch_workers": 4, "parse_workers": 1}
+        self.ws.run_crawl(url, 25, **options)
+        _, folder = self.ws.output_folder(url)
+
+        again = self.ws.run_crawl(url, 25, resume=False, **options)
+        self.assertTrue(again.startswith("✅ Crawl Complete!"), again)
+        report = next(name for name in os.listdir(folder) if name.endswith("_report.md"))
+        with open(os.path.join(folder, report), encoding="utf-8") as f:
+            self.assertIn("- Pages stored: 15 in 1 segment(s)", f.read())
+        writer = self.ws.CrawlWriter(folder)
+        self.assertEqual(len(writer.completed), 15)
+        writer.close()
+
+    def test_crawl_report_counts_cache_results(self):
+        base = self.serve(pages=15)
+        url = f"{base}/page0.html"
+        options = {"fetch_workers": 4, "parse_workers": 1}
+        _, folder = self.ws.output_folder(url)
+
+        def cache_line():
+            report = next(name for name in os.listdir(folder) if name.endswith("_report.md"))
+            with open(os.path.join(folder, report), encoding="utf-8") as f:
+                return next(line for line in f if line.startswith("- HTTP cache:"))
+
+        self.ws.run_crawl(url, 25, **options)
+        self.assertEqual(cache_line(), "- HTTP cache: 0 cache hit, 0 304 revalidated, 15 full fetch\n")
+        self.ws.run_crawl(url, 25, resume=False, **options)
+        counts = re.fullmatch(r"- HTTP cache: (\d+) cache hit, (\d+) 304 revalidated, (\d+) full fetch\n", cache_line())
+        hits, revalidated, full = map(int, counts.groups())
+        self.assertEqual((hits + revalidated, full), (15, 0))
+
+
+class CancelTests(ScraperTestCase):
+    def test_single_page_scrape_stops_after_the_fetch(self):
+        url = f"{self.serve(pages=1)}/page0.html"
+        cancel_event = threading.Event()
+        cancel_event.set()
+        summary = self.ws.scrape_page(url, cancel_event=cancel_event)
+        self.assertTrue(summary.startswith("⏹ Scrape Cancelled"), summary)
+        _, folder = self.ws.output_folder(url)
+        self.assertFalse(os.path.exists(folder) and os.listdir(folder))
+
+
+class HTTPCacheTests(ScraperTestCase):
+    def cached_files(self, directory):
+        return [name for _, _, names in os.walk(directory) for name in names if name.endswith(".body")]
+
+    def test_cache_follows_config_changes(self):
+        url = f"{self.serve(pages=1)}/page0.html"
+        self.ws.fetch_url_content(url)
+        self.assertEqual(len(self.cached_files(os.path.join("scraped_data", ".http_cache"))), 1)
+        self.ws.CACHE_CONFIG["directory"] = "elsewhere"
+        _, _, _, fetch_info = self.ws.fetch_url_content(url)
+        self.assertEqual(fetch_info["cache"], "miss")
+        self.assertEqual(len(self.cached_files("elsewhere")), 1)
+
+    def test_cli_out_moves_the_cache(self):
+        url = f"{self.serve(pages=1)}/page0.html"
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertEqual(self.ws.main(["scrape", url, "--out", "results"]), 0)
+        self.assertEqual(len(self.cached_files(os.path.join("results", ".http_cache"))), 1)
+        self.assertFalse(os.path.exists("scraped_data"))
+
+
+@needs_dependencies
+class TokenBucketTests(unittest.TestCase):
+    def setUp(self):
+        self.ws = load_script()
+
+    def test_allows_a_burst_then_the_steady_rate(self):
+        bucket = self.ws.TokenBucket(rate=10, burst=2)
+        now = bucket.updated
+        for _ in range(2):
+            self.assertEqual(bucket.ready_at(now), now)
+            bucket.consume(now)
+        self.assertAlmostEqual(bucket.ready_at(now), now + 0.1)
+        self.assertEqual(bucket.ready_at(now + 0.1), now + 0.1)
+
+    def test_refill_is_capped_at_the_burst(self):
+        bucket = self.ws.TokenBucket(rate=10, burst=2)
+        now = bucket.updated + 60
+        for _ in range(2):
+            bucket.consume(now)
+        self.assertGreater(bucket.ready_at(now), now)
+
+
+@needs_dependencies
+class HostSchedulerTests(unittest.TestCase):
+    def setUp(self):
+        self.ws = load_script()
+
+    def drain(self, scheduler, count):
+        taken = []
+        for _ in range(count):
+            url = scheduler.get(timeout=5)
+            self.assertIsNotNone(url)
+            taken.append((time.monotonic(), url))
+        return taken
+
+    def test_rate_limits_each_host_separately(self):
+        scheduler = self.ws.HostScheduler(requests_per_second=20, burst=1)
+        for n in range(4):
+            scheduler.put(f"http://a.test/{n}")
+            scheduler.put(f"http://b.test/{n}")
+        self.assertEqual(scheduler.host_count(), 2)
+        taken = self.drain(scheduler, 8)
+        self.assertEqual(scheduler.qsize(), 0)
+        self.assertIsNone(scheduler.get(timeout=0.01))
+        for host in ("a.test", "b.test"):
+            times = [t for t, url in taken if host in url]
+            self.assertEqual([url for _, url in taken if host in url], [f"http://{host}/{n}" for n in range(4)])
+            self.assertGreaterEqual(min(b - a for a, b in zip(times, times[1:])), 0.045)
+        # One host waiting on its bucket doesn't hold back the other.
+        self.assertNotEqual(taken[0][1].split("/")[2], taken[1][1].split("/")[2])
+
+    def test_crawl_delay_slows_a_host_down(self):
+        scheduler = self.ws.HostScheduler(requests_per_second=100, burst=5)
+        for n in range(2):
+            scheduler.put(f"http://slow.test/{n}")
+        started = time.monotonic()
+        scheduler.get(timeout=1)
+        scheduler.set_delay("slow.test", 0.3)
+        scheduler.get(timeout=2)
+        self.assertGreaterEqual(time.monotonic() - started, 0.28)
+
+    def test_crawl_delay_never_speeds_a_host_up(self):
+        scheduler = self.ws.HostScheduler(requests_per_second=2, burst=1)
+        scheduler.put("http://host.test/0")
+        scheduler.set_delay("host.test", 0.01)
+        self.assertEqual(scheduler._buckets["host.test"].rate, 2)
+        scheduler.set_delay("host.test", None)
+        self.assertEqual(scheduler._buckets["host.test"].rate, 2)
+
+
+class RobotsTests(ScraperTestCase):
+    def test_rules_and_crawl_delay_are_per_host_and_cached(self):
+        strict = self.serve({"robots.txt": "User-agent: *\nDisallow: /private\nCrawl-delay: 2\n"})
+        open_host = self.serve({"robots.txt": "User-agent: *\nDisallow:\n"})
+        missing = self.serve()
+        robots = self.ws.RobotsCache()
+        self.assertFalse(robots.allowed(f"{strict}/private/page.html"))
+        self.assertTrue(robots.allowed(f"{strict}/page.html"))
+        self.assertEqual(robots.crawl_delay(f"{strict}/page.html"), 2)
+        self.assertTrue(robots.allowed(f"{open_host}/private/page.html"))
+        self.assertIsNone(robots.crawl_delay(f"{open_host}/page.html"))
+        self.assertTrue(robots.allowed(f"{missing}/anything.html"))
+        for _ in range(3):
+            robots.allowed(f"{strict}/page.html")
+        self.assertEqual(robots.fetched, 3)
+
+    def test_crawl_obeys_each_hosts_robots(self):
+        pages = {f"page{n}.html": f"<html><body><p>Page {n} " + "words " * 50 + "</p>"
+                                  + "".join(f'<a href="/page{m}.html">{m}</a>' for m in range(4))
+                                  + '<a href="/private/secret.html">secret</a></body></html>'
+                 for n in range(4)}
+        pages["robots.txt"] = "User-agent: *\nDisallow: /private\nCrawl-delay: 1\n"
+        slow = self.serve(pages)
+        pages["robots.txt"] = "User-agent: *\nDisallow:\n"
+        fast = self.serve(pages)
+
+        handled = []
+        crawler = self.ws.Crawler([f"{slow}/page0.html", f"{fast}/page0.html"], max_pages=20, fetch_workers=4,
+                                  parse_workers=1,
+                                  on_page=lambda page: handled.append((time.monotonic(), page["url"], page["error"])))
+        stats = crawler.run()
+        blocked = [url for _, url, error in handled if error == "Disallowed by robots.txt"]
+        self.assertEqual(blocked, [f"{slow}/private/secret.html"])
+        self.assertIn(f"{fast}/private/secret.html", [url for _, url, _ in handled])
+        self.assertEqual(stats["robots_blocked"], 1)
+        # Crawl-delay: 1 on the slow host, none on the fast one.
+        slow_times = [t for t, url, error in handled if url.startswith(slow) and not error]
+        self.assertEqual(len(slow_times), 4)
+        self.assertGreaterEqual(slow_times[-1] - slow_times[0], 2.5)
+        fast_times = [t for t, url, _ in handled if url.startswith(fast)]
+        self.assertLess(fast_times[-1] - fast_times[0], 1.0)
+
+
+if __name__ == "__main__":
+    unittest.main()